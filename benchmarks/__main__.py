@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Run the benchmark suite
+
+    python -m benchmarks [--json results.json] [--baseline baseline.json] [--threshold 0.25] [case ...]
+
+With --baseline, exits with status 1 if any case is slower than the baseline by
+more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+
+from . import suite
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("cases", nargs="*", help="run only cases containing these names")
+    parser.add_argument("--number", type=int, default=10_000, help="operations per run")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="JSON results to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed slowdown (default 0.25)"
+    )
+    args = parser.parse_args(argv)
+
+    results = suite.run(number=args.number, selected=args.cases)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    for name, ns in results.items():
+        line = f"{name:<32} {ns:12.1f} ns/op"
+        if base := baseline.get(name):
+            line += f" {ns / base:8.2f}x"
+        print(line)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(suite.as_json(results), f, indent=2)
+
+    slower = suite.regressions(results, baseline, args.threshold)
+    for name, ratio in slower.items():
+        print(f"REGRESSION {name}: {ratio:.2f}x baseline", file=sys.stderr)
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
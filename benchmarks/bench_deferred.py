@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Per-access cost of django settings reads with and without the deferred handler
+
+    python -m benchmarks.bench_deferred
+"""
+
+import timeit
+from unittest.mock import MagicMock
+
+from django.conf import LazySettings
+
+from django_settings_env import deferred
+
+NUMBER = 200_000
+
+
+def _settings():
+    env = MagicMock()
+    env.get.return_value = "deferred-value"
+    settings = LazySettings()
+    settings.configure(
+        DEBUG=True,
+        DEFERRED=deferred.DeferredSetting(env, scope=None, kwargs={"name": "DEFERRED"}),
+    )
+    return settings
+
+
+def _per_access(settings, name, number=NUMBER) -> float:
+    timer = timeit.Timer(f"settings.{name}", globals={"settings": settings})
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e9
+
+
+def run():
+    """
+    Return per-access times in nanoseconds
+    """
+    deferred.restore_handler()
+    plain = LazySettings()
+    plain.configure(DEBUG=True)
+    results = {"plain DEBUG": _per_access(plain, "DEBUG")}
+
+    settings = _settings()
+    results["wrapped DEBUG"] = _per_access(settings, "DEBUG")
+    results["wrapped DEFERRED"] = _per_access(settings, "DEFERRED")
+
+    deferred.resolve_in_place(settings)
+    results["resolved DEBUG"] = _per_access(settings, "DEBUG")
+    results["resolved DEFERRED"] = _per_access(settings, "DEFERRED")
+    return results
+
+
+def main():
+    for name, ns in run().items():
+        print(f"{name:<20} {ns:8.1f} ns/access")
+
+
+if __name__ == "__main__":
+    main()
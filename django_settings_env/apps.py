@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Optional django app, only required for the startup hooks below
+
+- SETTINGS_ENV_RESOLVE_DEFERRED: True (or the maximum number of concurrent lookups)
+  to resolve all deferred settings before the first request
+- SETTINGS_ENV_TRACE_FILE: file to write startup traces to, if tracing is enabled
+  (see django_settings_env.trace), otherwise they are logged
+- SETTINGS_ENV_ACCESS_COUNTERS: True (or count 1 in every N reads) to count
+  settings reads and deferred value resolutions (see django_settings_env.counters)
+- SETTINGS_ENV_ACCESS_FILE: file to write the access counters to at exit, "{pid}"
+  is replaced by the process id; read by the settings_access management command
+"""
+
+import atexit
+
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class DjangoSettingsEnvConfig(AppConfig):
+    name = "django_settings_env"
+    verbose_name = "Django Settings Env"
+
+    def ready(self):
+        if resolve := getattr(settings, "SETTINGS_ENV_RESOLVE_DEFERRED", False):
+            from .deferred import resolve_all
+
+            if resolve is True:
+                resolve_all()
+            else:
+                resolve_all(max_workers=int(resolve))
+
+        if sample := getattr(settings, "SETTINGS_ENV_ACCESS_COUNTERS", False):
+            from . import counters
+
+            counters.enable(1 if sample is True else int(sample))
+            if path := getattr(settings, "SETTINGS_ENV_ACCESS_FILE", None):
+                atexit.register(counters.save, path)
+
+        from .trace import dump_traces, traces
+
+        if traces():
+            dump_traces(getattr(settings, "SETTINGS_ENV_TRACE_FILE", None))
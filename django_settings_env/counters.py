@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Settings access counters
+
+Optionally counts reads of each setting made through django.conf.settings, and the
+number and cumulative time of deferred value resolutions, to find settings read
+in tight loops and deferred values that are never used. Counting replaces the
+deferred LazySettings wrapper while enabled (deferred.restore_handler() then takes
+effect once it stops), so there is no overhead unless it is enabled.
+"""
+
+import json
+import os
+import time
+from functools import wraps
+from typing import Dict
+
+from . import deferred
+
+__all__ = (
+    "AccessCounters",
+    "counters",
+    "disable",
+    "enable",
+    "save",
+)
+
+_counters: "AccessCounters | None" = None
+
+
+class AccessCounters:
+    """
+    Setting reads and deferred value resolutions in this process
+    """
+
+    def __init__(self, sample: int = 1):
+        """
+        :param sample: count 1 in every sample reads (estimated counts are scaled up)
+        """
+        self.sample = max(1, int(sample))
+        self.started = time.time()
+        self._tick = 0
+        self._reads: Dict[str, int] = {}
+        # name -> [count, seconds]
+        self._resolutions: Dict[str, list] = {}
+
+    def read(self, name: str):
+        # sampled reads are not synchronised, so counts are approximate under threads
+        self._tick += 1
+        if self._tick % self.sample == 0:
+            self._reads[name] = self._reads.get(name, 0) + 1
+
+    def resolved(self, name: str, seconds: float):
+        entry = self._resolutions.get(name)
+        if entry is None:
+            entry = self._resolutions[name] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+
+    @property
+    def reads(self) -> Dict[str, int]:
+        """
+        Estimated reads by setting name
+        """
+        return {name: count * self.sample for name, count in self._reads.items()}
+
+    @property
+    def resolutions(self) -> Dict[str, Dict]:
+        """
+        Deferred value resolutions by setting name
+        """
+        return {
+            name: {"count": count, "seconds": seconds}
+            for name, (count, seconds) in self._resolutions.items()
+        }
+
+    def unused(self) -> list:
+        """
+        Names of deferred settings that have never been resolved
+        """
+        names = {d.name for d in deferred.deferred_settings()} - {None}
+        return sorted(names - set(self._resolutions))
+
+    def as_dict(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "started": self.started,
+            "sample": self.sample,
+            "reads": self.reads,
+            "resolutions": self.resolutions,
+            "unused": self.unused(),
+        }
+
+    def save(self, path: str):
+        """
+        Write the counters as JSON, "{pid}" in path is replaced by the process id
+        """
+        with open(path.format(pid=os.getpid()), "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+
+def _counted_setting(self, name, value):
+    # as deferred.cache_setting(), but timing each resolution
+    if isinstance(value, deferred.DeferredSetting):
+        cache = deferred.settings_cache(self)
+        cached = cache.get(name, value)
+        if cached is deferred._missing:
+            start = time.perf_counter()
+            cached = value.setting(name)
+            if (counters := _counters) is not None:
+                counters.resolved(name, time.perf_counter() - start)
+            cache.set(name, value, cached)
+        value = cached
+    return value
+
+
+def _counting(func):
+    @wraps(func)
+    def wrapper(self, name):
+        value = func(self, name)
+        if (counters := _counters) is not None and name.isupper():
+            counters.read(name)
+        return _counted_setting(self, name, value)
+
+    return wrapper
+
+
+def enable(sample: int = 1) -> AccessCounters:
+    """
+    Start counting settings reads, discarding any previous counts
+    :param sample: count 1 in every sample reads to bound the overhead
+    """
+    global _counters
+    _counters = AccessCounters(sample)
+    deferred._override_handlers((_counting, _counting))
+    return _counters
+
+
+def disable() -> AccessCounters | None:
+    """
+    Stop counting, restoring the deferred wrapper if deferred settings require it,
+    otherwise plain settings access
+    :return: the counters as they were when counting stopped
+    """
+    global _counters
+    stopped, _counters = _counters, None
+    if stopped is not None:
+        deferred._override_handlers(None)
+    return stopped
+
+
+def counters() -> "AccessCounters | None":
+    """
+    Return the active counters, or None if counting is not enabled
+    """
+    return _counters
+
+
+def save(path: str):
+    """
+    Save the active counters, if any (see AccessCounters.save)
+    """
+    if (active := _counters) is not None:
+        active.save(path)
@@ -1,17 +1,88 @@
 # -*- coding: utf-8 -*-
+import inspect
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
+from typing import Dict, Iterable
 
 from django.conf import LazySettings
 
+logger = logging.getLogger(__name__)
+
+
+_missing = object()
+
+
+class DeferredCache:
+    """
+    Resolved DeferredSetting values for a single settings object.
+    An entry is only valid for the DeferredSetting it was resolved from and while
+    the generation of that setting's env is unchanged.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def get(self, name, deferred):
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] is deferred and entry[1] == deferred.generation:
+            return entry[2]
+        return _missing
+
+    def set(self, name, deferred, value):
+        self._entries[name] = (deferred, deferred.generation, value)
+
+    def invalidate(self, name=None):
+        if name is None:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        else:
+            entries = [entry] if (entry := self._entries.pop(name, None)) else []
+        # also discard any value prefetched by resolve_all()
+        for entry in entries:
+            entry[0].clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# caches are keyed by the configured settings object (LazySettings._wrapped), so that
+# reconfigured settings and override_settings each get their own cache
+_caches = weakref.WeakKeyDictionary()
+
+
+def settings_cache(settings) -> DeferredCache:
+    wrapped = getattr(settings, "_wrapped", settings)
+    try:
+        return _caches[wrapped]
+    except KeyError:
+        return _caches.setdefault(wrapped, DeferredCache())
+
+
+def invalidate(name=None, settings=None):
+    """
+    Discard cached deferred values
+    :param name: setting name (default is all settings)
+    :param settings: LazySettings instance (default is all settings objects)
+    """
+    caches = (
+        [settings_cache(settings)] if settings is not None else list(_caches.values())
+    )
+    for cache in caches:
+        cache.invalidate(name)
+
 
 def cache_setting(self, name, value):
     if isinstance(value, DeferredSetting):
-        if not hasattr(cache_setting, "cache"):
-            cache_setting.cache = {}
-        cache = cache_setting.cache
-        if name not in cache:
-            cache[name] = value.setting(name)
-        value = cache[name]
+        cache = settings_cache(self)
+        cached = cache.get(name, value)
+        if cached is _missing:
+            cached = value.setting(name)
+            cache.set(name, value, cached)
+        value = cached
     return value
 
 
@@ -32,39 +103,258 @@ def deferred_getattribute(func):
     return wrapper
 
 
+_original_handlers = {}
+# the wrappers deferred settings require (None once restored), and those installed
+# over them while settings reads are counted (see counters)
+_deferred_wrappers = None
+_override_wrappers = None
+
+
+def _install_handlers():
+    # wrap the original LazySettings handlers with the wrappers in effect, if any,
+    # replacing any wrappers already installed
+    if not _original_handlers:
+        # __getattribute__ is normally inherited from LazyObject, so record None for it
+        for name in ("__getattr__", "__getattribute__"):
+            _original_handlers[name] = LazySettings.__dict__.get(name)
+    wrappers = _override_wrappers or _deferred_wrappers
+    if wrappers is None:
+        for name, func in _original_handlers.items():
+            if func is None:
+                if name in LazySettings.__dict__:
+                    delattr(LazySettings, name)
+            else:
+                setattr(LazySettings, name, func)
+    else:
+        for name, wrapper in zip(("__getattr__", "__getattribute__"), wrappers):
+            original = _original_handlers[name] or getattr(LazySettings.__base__, name)
+            setattr(LazySettings, name, wrapper(original))
+    deferred_handler.__enabled__ = wrappers is not None
+
+
+def _override_handlers(wrappers):
+    # install wrappers in place of the deferred wrappers (or None to end the override),
+    # which remain in effect underneath, whether installed or restored meanwhile
+    global _override_wrappers
+    _override_wrappers = wrappers
+    _install_handlers()
+
+
 def deferred_handler():
     # at least one DeferredSetting is being used, so override the __getattr__ handler for the setting module
     # to catch any DeferredSetting use and return an appropriate value from the environment
-    if not getattr(deferred_handler, "__enabled__", False):
+    global _deferred_wrappers
+    if _deferred_wrappers is None:
         # need to overwrite both because __getattr__ is not called if the setting is defined (no longer lazy)
-        setattr(LazySettings, "__getattr__", deferred_getattr(LazySettings.__getattr__))
-        setattr(
-            LazySettings,
-            "__getattribute__",
-            deferred_getattribute(LazySettings.__getattribute__),
-        )
-        deferred_handler.__enabled__ = True
+        _deferred_wrappers = (deferred_getattr, deferred_getattribute)
+        _install_handlers()
+
+
+def restore_handler():
+    # remove the overrides installed by deferred_handler(), restoring plain django settings access
+    # (once counting stops, if settings reads are being counted)
+    global _deferred_wrappers
+    if _deferred_wrappers is not None:
+        _deferred_wrappers = None
+        _install_handlers()
+
+
+def resolve_in_place(settings=None, restore=True):
+    """
+    Resolve all DeferredSetting values once and write them back into the configured
+    settings object, so that the LazySettings overrides are no longer required.
+    :param settings: LazySettings instance (default is django.conf.settings)
+    :param restore: remove the LazySettings overrides once values are resolved
+    :return: list of resolved setting names
+    """
+    if settings is None:
+        from django.conf import settings
+    if not settings.configured:
+        # noinspection PyProtectedMember
+        settings._setup()
+    # noinspection PyProtectedMember
+    wrapped = settings._wrapped
+    resolved = []
+    for name in dir(wrapped):
+        if name.isupper():
+            value = getattr(wrapped, name, None)
+            if isinstance(value, DeferredSetting):
+                # assigning via LazySettings also discards any value it has cached
+                setattr(settings, name, cache_setting(settings, name, value))
+                resolved.append(name)
+    if restore:
+        restore_handler()
+    return resolved
+
+
+def resolve_all(
+    deferred: Iterable["DeferredSetting"] | None = None, max_workers: int = 8
+) -> Dict[str, float]:
+    """
+    Resolve outstanding DeferredSetting values concurrently, so that the first
+    access of each setting does not pay for a (potentially remote) lookup.
+    :param deferred: DeferredSetting instances (default is all outstanding instances)
+    :param max_workers: maximum number of concurrent lookups
+    :return: resolution time in seconds for each setting name
+    """
+    if deferred is None:
+        deferred = deferred_settings()
+    # names may need to be found in the declaring scope, do that up front
+    pending = [(d, name) for d in deferred if not d.resolved and (name := d.name)]
+    latency = {}
+    if not pending:
+        return latency
+
+    def timed_resolve(item):
+        start = time.perf_counter()
+        item[0].resolve(item[1])
+        return item[1], time.perf_counter() - start
+
+    workers = max(1, min(max_workers, len(pending)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="deferred") as pool:
+        for name, elapsed in pool.map(timed_resolve, pending):
+            latency[name] = elapsed
+            logger.debug(f"deferred setting {name} resolved in {elapsed * 1000:.1f}ms")
+    return latency
+
+
+# all DeferredSetting instances, used to find outstanding values
+_registry = weakref.WeakSet()
+
+
+def deferred_settings(env=None) -> list:
+    """
+    Return all live DeferredSetting instances, optionally only those created by env
+    """
+    return [d for d in list(_registry) if env is None or d.env is env]
+
+
+class ScopeIndex:
+    """
+    DeferredSetting instances declared in a single scope that are waiting to be
+    named. The scope's namespace is scanned once to name all of them, after which
+    the index (and with it any reference to the declaring frame) is discarded.
+    """
+
+    __slots__ = ("source", "pending")
+
+    def __init__(self, source):
+        # either a live namespace (module or class body) or an optimised function frame
+        self.source = source
+        self.pending = []
+
+    def namespace(self):
+        return getattr(self.source, "f_locals", self.source)
+
+    def assign_names(self):
+        names = {}
+        for name, value in list(self.namespace().items()):
+            if isinstance(value, DeferredSetting):
+                names.setdefault(id(value), name)
+        pending = []
+        for deferred in self.pending:
+            if (name := names.get(id(deferred))) is not None:
+                deferred._scope_name, deferred._scope = name, None
+            else:  # not (yet) bound to a name in this scope
+                pending.append(deferred)
+        self.pending = pending
+
+
+_scopes = {}
+_scopes_lock = threading.Lock()
+
+
+def _scope_source(scope):
+    code = getattr(scope, "f_code", None)
+    if code is not None and code.co_flags & inspect.CO_OPTIMIZED:
+        # function locals are a snapshot, so the frame is needed until names are known
+        return scope
+    # module and class namespaces are live dicts, so avoid pinning the frame
+    return scope.f_locals
+
+
+def _add_to_scope(deferred, scope) -> ScopeIndex:
+    source = _scope_source(scope)
+    with _scopes_lock:
+        index = _scopes.get(id(source))
+        if index is None:
+            index = _scopes[id(source)] = ScopeIndex(source)
+        index.pending.append(deferred)
+    return index
+
+
+def _name_from_scope(index: ScopeIndex):
+    with _scopes_lock:
+        index.assign_names()
+        if not index.pending:
+            _scopes.pop(id(index.source), None)
 
 
 class DeferredSetting:
     # similar to django-class-settings DeferredEnv but simpler
     # and handles settings at module level not in a Settings class
 
+    __slots__ = (
+        "_name",
+        "_scope_name",
+        "_scope",
+        "_env",
+        "_kwargs",
+        "_resolved",
+        "__weakref__",
+    )
+
     def __init__(self, env, *, scope, kwargs):
         self._name = kwargs.pop("name", None) or None
-        self._env, self._scope, self._kwargs = env, scope, kwargs
+        self._env, self._kwargs = env, kwargs
+        self._scope_name = self._resolved = None
+        # the scope is only required to find the name this value is assigned to
+        self._scope = _add_to_scope(self, scope) if scope and not self._name else None
+        _registry.add(self)
         deferred_handler()
 
     def __get_variable_name(self, name):
         name = self._name or name
         if name is None:
-            names = [n for n, v in self._scope.f_locals.items() if v is self]
-            name = names[0] if names else None
+            if self._scope is not None:
+                _name_from_scope(self._scope)
+            name = self._scope_name
         return name
 
+    @property
+    def generation(self):
+        # changes whenever the env is modified, invalidating cached values
+        return getattr(self._env, "generation", 0)
+
+    @property
+    def env(self):
+        return self._env
+
+    @property
+    def name(self):
+        return self.__get_variable_name(None)
+
+    @property
+    def resolved(self) -> bool:
+        return self._resolved is not None and self._resolved[0] == self.generation
+
+    def resolve(self, name):
+        # resolved values are kept until the env changes or the value is cleared
+        generation = self.generation
+        if (
+            self._resolved is None
+            or self._resolved[0] != generation
+            or self._resolved[1] != name
+        ):
+            self._resolved = (generation, name, self._env.get(name, **self._kwargs))
+        return self._resolved[2]
+
+    def clear(self):
+        self._resolved = None
+
     def setting(self, name):
         name = self.__get_variable_name(name)
-        return self._env.get(name, **self._kwargs) if name else ""
+        return self.resolve(name) if name else ""
 
     def __repr__(self):
         return self.setting(self._name) or ""
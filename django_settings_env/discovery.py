@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Locate the .env file(s) that envex would read for a given set of options
+
+discover() caches the result for the process, keyed by the options and the
+working directory, and validated by the mtime and inode of each directory
+searched and file found, so that a file added, removed or replaced is noticed.
+"""
+
+import os
+import threading
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, List, MutableMapping, Tuple
+
+from envex import env_wrapper
+from envex.dot_env import DEFAULT_DOTENV, DEFAULT_ENVKEY, ENCRYPTED_EXT
+
+__all__ = (
+    "env_file_name",
+    "search_paths",
+    "find_env_files",
+    "discover",
+    "discovery_cache_info",
+    "clear_discovery_cache",
+)
+
+DiscoveryCacheInfo = namedtuple("DiscoveryCacheInfo", "hits misses currsize")
+
+# key -> (files, stamps of the directories searched and files found)
+_discovered: Dict[tuple, Tuple[tuple, tuple]] = {}
+_discovered_lock = threading.Lock()
+_hits = _misses = 0
+
+
+def env_file_name(env_file: str | None, environ: MutableMapping[str, str]) -> str:
+    return env_file or environ.get(DEFAULT_ENVKEY, DEFAULT_DOTENV)
+
+
+def search_paths(search_path, overwrite: bool = False) -> List[Path]:
+    """
+    Normalise search_path the same way as envex.load_env
+    """
+    if search_path is None:
+        # envex defaults to the cwd and the location of its own Env.read_env caller
+        search_path = [".", env_wrapper.__file__]
+    elif isinstance(search_path, Path):
+        search_path = [search_path]
+    elif isinstance(search_path, (str, bytes)):
+        search_path = search_path.split(os.pathsep)
+    paths = [Path(p) for p in search_path]
+    if overwrite:
+        paths.reverse()
+    return paths
+
+
+def _resolve_file(base_path: Path, name: str, decrypt: bool) -> Path | None:
+    if decrypt:
+        encrypted_path = os.path.join(base_path, name + ENCRYPTED_EXT)
+        if os.access(encrypted_path, os.R_OK):
+            return Path(encrypted_path)
+    standard_path = os.path.join(base_path, name)
+    return Path(standard_path) if os.access(standard_path, os.R_OK) else None
+
+
+def _walk(
+    env_file: str, search_path: List[Path], parents: bool, decrypt: bool
+) -> Tuple[List[Path], List[Path]]:
+    """
+    Search as envex does, returning the files found and the directories searched
+    """
+    found, searched = [], []
+    for path in search_path:
+        path = path.resolve()
+        if not path.is_dir():
+            path = path.parent
+        for sub_path in [path, *path.parents]:
+            searched.append(sub_path)
+            if env_path := _resolve_file(sub_path, env_file, decrypt):
+                found.append(env_path.resolve())
+                break
+            elif not parents:
+                break
+    return found, searched
+
+
+def find_env_files(
+    env_file: str, search_path: List[Path], parents: bool, decrypt: bool
+) -> List[Path]:
+    """
+    Return the env files found in the search path, in the order they are read
+    :param env_file: base environment file name
+    :param search_path: normalised list of paths (see search_paths)
+    :param parents: whether to search upwards until a file is found
+    :param decrypt: whether the encrypted variant takes priority
+    """
+    return _walk(env_file, search_path, parents, decrypt)[0]
+
+
+def file_stamp(path: str | Path) -> tuple | None:
+    """
+    Identify a file's current content by (mtime, ctime, inode, size), ctime so
+    that permission changes are noticed, or None if it doesn't exist
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_ctime_ns, st.st_ino, st.st_size
+
+
+def discover(
+    env_file: str, search_path: List[Path], parents: bool, decrypt: bool
+) -> tuple:
+    """
+    Cached find_env_files(), the result is shared by all Env instances
+    """
+    global _hits, _misses
+    cwd = os.getcwd()
+    key = (env_file, tuple(map(str, search_path)), parents, decrypt, cwd)
+    entry = _discovered.get(key)
+    if entry is not None and all(file_stamp(p) == stamp for p, stamp in entry[1]):
+        _hits += 1
+        return entry[0]
+    _misses += 1
+    found, searched = _walk(env_file, search_path, parents, decrypt)
+    files = tuple(found)
+    stamps = tuple((p, file_stamp(p)) for p in dict.fromkeys([*searched, *found]))
+    with _discovered_lock:
+        _discovered[key] = (files, stamps)
+    return files
+
+
+def discovery_cache_info() -> DiscoveryCacheInfo:
+    return DiscoveryCacheInfo(_hits, _misses, len(_discovered))
+
+
+def clear_discovery_cache():
+    global _hits, _misses
+    with _discovered_lock:
+        _discovered.clear()
+        _hits = _misses = 0
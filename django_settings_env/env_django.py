@@ -4,22 +4,134 @@ Wrapper around os.environ with django config value parsers
 """
 
 import contextlib
+import copy
 import inspect
-import importlib
+import logging
+import weakref
+from collections import namedtuple
+from functools import partial
+from types import MappingProxyType
 from typing import List
 
 from django.core.exceptions import ImproperlyConfigured
 from envex import Env
 
+from .trace import trace_enabled, traced_class
+
+logger = logging.getLogger(__name__)
+
 _DEFAULT_PREFIX = "DJANGO_"
 _USE_DEFAULT_PREFIX = object()
 
+TypedCacheInfo = namedtuple("TypedCacheInfo", "hits misses currsize")
+
+_NO_SECRETS = MappingProxyType({})
+
+# Env arguments passed to envex's SecretsManager
+_VAULT_OPTIONS = (
+    "url",
+    "token",
+    "cert",
+    "verify",
+    "base_path",
+    "engine",
+    "mount_point",
+    "timeout",
+)
+
+
+def _plugin_method(plugin, name: str):
+    """
+    Create the DjangoEnv method for a plugin. The plugin is looked up on each call,
+    which is a lock-free read of the plugin registry.
+    """
+
+    def method(
+        self,
+        var=None,
+        *,
+        default=None,
+        backend=None,
+        engine=None,
+        prefix=_USE_DEFAULT_PREFIX,
+        **kwargs,
+    ):
+        if backend and engine:
+            raise ValueError("You cannot specify both 'backend' and 'engine'")
+        rplugin = plugin.get_plugin_from_name(name)
+        if var is None:
+            # Use the default value specified by the plugin if necessary
+            var = getattr(rplugin, "VAR", None)
+        # Determine the URL using the check_var method
+        url = self.check_var(var, prefix=prefix, default=default)
+        # kwargs is private to this call, so it can be updated directly
+        if kwargs and None in kwargs.values():
+            kwargs = {k: v for k, v in kwargs.items() if v is not None}
+        if backend is not None:
+            kwargs["backend"] = backend
+        if engine is not None:
+            kwargs["engine"] = engine
+        return self._get_backend(name, rplugin, url, kwargs)
+
+    method.__name__ = method.__qualname__ = name
+    method.__doc__ = f"Return the configuration provided by the {name} plugin"
+    return method
+
+
+def _family_method(plugin, family: str, name: str):
+    """
+    Create the DjangoEnv method for a plugin family, returning the configuration of
+    every alias. Variables are found by prefix in the env's key index, and each
+    distinct URL is passed to the plugin only once.
+    """
+
+    def method(self, *, prefix=_USE_DEFAULT_PREFIX, **kwargs) -> dict:
+        rplugin = plugin.get_plugin_from_name(name)
+        if prefix is _USE_DEFAULT_PREFIX:
+            prefix = self.prefix
+        index = self._key_index()
+        names = [
+            n for start in rplugin.family_prefixes(prefix) for n in index.range(start)
+        ]
+        aliases = rplugin.family_aliases(names, prefix)
+        if kwargs and None in kwargs.values():
+            kwargs = {k: v for k, v in kwargs.items() if v is not None}
+        configs, by_url = {}, {}
+        # the default alias first, as Django expects
+        for alias in sorted(aliases, key=lambda a: (a != plugin.DEFAULT_ALIAS, a)):
+            if not (url := self.get(aliases[alias], prefix="")):
+                continue
+            if url in by_url:
+                # each alias gets its own copy, as Django may modify them
+                configs[alias] = copy.deepcopy(by_url[url])
+            else:
+                configs[alias] = by_url[url] = self._get_backend(
+                    name, rplugin, url, dict(kwargs)
+                )
+        return configs
+
+    method.__name__ = method.__qualname__ = family
+    method.__doc__ = f"Return the {name} configuration of every alias, keyed by alias"
+    return method
+
 
 class DjangoEnv(Env):
     """
     Wrapper around os.environ with .env enhancement django, and Hashicorp vault support
     """
 
+    def __new__(cls, *args, **kwargs):
+        from .preload import frozen_env, init_args
+
+        if (env := frozen_env(cls, args, kwargs)) is not None:
+            return env
+        env = super().__new__(
+            traced_class(cls) if trace_enabled(kwargs.get("trace")) else cls
+        )
+        # retained so that freeze() can register the instance by its arguments
+        env._init_args = init_args(cls, args, kwargs)
+        return env
+
     def __init__(self, *args, **kwargs):
         """
         @param args: dict (optional) environment variables
@@ -34,6 +146,8 @@ class DjangoEnv(Env):
         @param parents: bool whether to search parent directories for env_file (default=**True**)
         @param update: bool whether to update os.environ with values from env_file (default=False)
         @param errors: bool whether to raise error on missing env_file (default=False)
+        @param decrypt_cache: (optional) bool | str | Path cache decrypted .env.enc content in memory,
+            or also in files in this directory ("{uid}" is replaced by the user id)
         - kwargs for vault/secrets manager:
         @param url: (optional) vault url, default is $VAULT_ADDR
         @param token: (optional) vault token, default is $VAULT_TOKEN or ~/.vault-token
@@ -45,32 +159,363 @@ class DjangoEnv(Env):
         @param mount_point: (optional) str vault secrets mount point (default=None, determined by engine)
         @param timeout: (optional) int timeout for connecting to vault (default=5)
         @param working_dirs: (optional) bool whether to include PWD/CWD (default=True)
+        @param vault_prefetch: (optional) list of secret paths to read concurrently at startup,
+            and the base path ("") if not listed
+        @param vault_budget: (optional) float total time allowed for vault_prefetch (default=5)
+        @param vault_deadline: (optional) float read vault in the background, waiting at most this long
+        @param vault_key_timeout: (optional) float time the first lookup of a key waits for vault (default=1)
+        @param vault_cache: (optional) str | Path encrypted file to cache vault secrets in
+        @param vault_cache_ttl: (optional) float time in seconds cached secrets are used for (default=300)
+        - kwargs for compiled snapshots:
+        @param snapshot: (optional) str | Path snapshot file to load resolved values from
+        - kwargs for reloading changed .env files:
+        @param watch: (optional) bool | dict watch .env files and reload them when changed,
+            a dict gives EnvWatcher arguments (interval, debounce, polling)
+        - startup trace:
+        @param trace: (optional) bool record timings and value sources (default=$DJANGO_SETTINGS_ENV_TRACE)
         -
         @param kwargs: (optional) environment variables to add/override
         """
         self.prefix = kwargs.pop("prefix", _DEFAULT_PREFIX)
+        kwargs.pop("trace", None)
+        vault = {
+            "prefetch": kwargs.pop("vault_prefetch", None),
+            "budget": kwargs.pop("vault_budget", 5.0),
+            "deadline": kwargs.pop("vault_deadline", None),
+            "key_timeout": kwargs.pop("vault_key_timeout", 1.0),
+            "cache": kwargs.pop("vault_cache", None),
+            "cache_ttl": kwargs.pop("vault_cache_ttl", 300.0),
+            "options": {k: kwargs[k] for k in _VAULT_OPTIONS if k in kwargs},
+        }
+        # preload() waits at most this long for background vault loading
+        self._vault_deadline = vault["deadline"]
+        if vault["deadline"] is not None:
+            # finding the engine's mount point requires vault, so is left to the loader
+            kwargs.pop("engine", None)
+        self._snapshot_path = kwargs.pop("snapshot", None)
+        watch = kwargs.pop("watch", None)
+        # read_env() arguments and result, retained for reload() if watching
+        self._watching = bool(watch)
+        self._read_options = self._read_base = self._loaded = None
+        self.watcher = None
+        self._snapshot = None
+        self._snapshot_base = None
+        self._snapshot_loaded = False
+        self._generation = 0
+        # resolved variable names, keyed by var then prefix
+        self._prefixed = {}
+        # converted int/float/bool/list values, keyed by resolved name
+        self._typed = {}
+        # sorted names of all variables (see namespace), built when first needed
+        self._index = None
+        self._index_state = None
+        # the secrets manager whose secrets have been read for the index
+        self._index_secrets = None
+        self._typed_hits = self._typed_misses = 0
         # by default, use Django config exception in preference to KeyError
         kwargs.setdefault("exception", ImproperlyConfigured)
         # change default to read .env files and search parents as well
         kwargs.setdefault("readenv", True)
         kwargs.setdefault("parents", True)
         super().__init__(*args, **kwargs)
-        self._init_plugins()
+        if self._snapshot_path:
+            if self._snapshot is None:
+                # .env files were not read, only vault and plugin values apply
+                self._load_snapshot(self.env, {"readenv": False})
+            if self._snapshot_loaded:
+                self.secret_manager = self._snapshot.secrets_manager()
+        if not self._snapshot_loaded:
+            self._start_vault(**vault)
+        if watch and self._loaded is not None:
+            from .watch import EnvWatcher
+
+            self.watcher = EnvWatcher(self, **(watch if isinstance(watch, dict) else {}))
+
+    def _start_vault(
+        self, prefetch, budget, deadline, key_timeout, cache, cache_ttl, options
+    ):
+        """
+        Replace or prime the secrets manager as required by the vault_* options
+        """
+        paths = prefetch or [""]
+        secrets_cache = cached = None
+        if cache and (
+            secrets_cache := self._secrets_cache(cache, cache_ttl, options, paths)
+        ):
+            cached = secrets_cache.load()
+            if cached and secrets_cache.fresh(cached[1]):
+                return self._use_cached_secrets(cached[0])
+        if deadline is not None:
+            from envex.env_hvac import SecretsManager
+
+            from .vault import BackgroundSecrets, configured
+
+            self.secret_manager = BackgroundSecrets(
+                partial(SecretsManager, **options),
+                paths=paths,
+                key_timeout=key_timeout,
+                fallback=cached[0] if cached else None,
+                on_load=self._vault_loaded(secrets_cache),
+                enabled=configured(options.get("url"), options.get("token")),
+            )
+            self.secret_manager.wait(deadline)
+        elif secrets_cache:
+            with secrets_cache.lock(budget):
+                # another process may have refreshed the cache while this one waited
+                if (reloaded := secrets_cache.load()) and secrets_cache.fresh(
+                    reloaded[1]
+                ):
+                    self._use_cached_secrets(reloaded[0])
+                elif self.prefetch_secrets(paths, budget=budget).keys() >= set(paths):
+                    secrets_cache.save(self.secret_manager.secrets)
+                elif cached := reloaded or cached:
+                    logger.warning(
+                        f"vault unavailable, using secrets cached {cached[1]:.0f}s ago"
+                    )
+                    self._use_cached_secrets(cached[0])
+        elif prefetch:
+            self.prefetch_secrets(prefetch, budget=budget)
+
+    def _vault_loaded(self, secrets_cache):
+        """
+        Callback for when background loading has read the secrets. Lookups made
+        while loading may have cached defaults, or names with the prefix added
+        for keys only in vault, so all derived values are discarded.
+        """
+        env_ref = weakref.ref(self)
+
+        def on_load(secrets):
+            if secrets_cache is not None:
+                secrets_cache.save(secrets)
+            if (env := env_ref()) is not None:
+                env._changed()
+
+        return on_load
+
+    def _use_cached_secrets(self, secrets):
+        from .secrets_cache import CachedSecrets
+
+        self.secret_manager = CachedSecrets(self.secret_manager, secrets)
+
+    @staticmethod
+    def _secrets_cache(path, ttl, options, paths):
+        from .secrets_cache import SecretsCache
+
+        token = options.get("token")
+        if not token:
+            try:
+                from hvac.utils import get_token_from_env
+            except ImportError:
+                return None
+            token = get_token_from_env()
+        if not token:
+            logger.debug("vault cache not used: no vault token")
+            return None
+        return SecretsCache(path, token, SecretsCache.identity(options, paths), ttl)
+
+    def preload(self, plugins=None, timeout: float | None = None):
+        """
+        Resolve everything this env provides ahead of freeze(): vault secrets, the
+        prefixed names of all variables, deferred settings and plugin results
+        @param plugins: (optional) plugin method names, default is all those whose
+            variable is set
+        @param timeout: (optional) time to wait for background vault loading, default
+            is vault_deadline; loading then stops, and the secrets available are used
+        @return: self
+        """
+        from .preload import preload
+
+        if timeout is None:
+            timeout = self._vault_deadline
+        return preload(self, plugins=plugins, timeout=timeout)
+
+    def freeze(self, gc_freeze: bool = True, timeout: float | None = None):
+        """
+        Make this env immutable, so that pre-forked workers share it copy-on-write,
+        and Env() with the same arguments returns it (see preload module).
+        Values not resolved by preload() or before freezing are still available,
+        but are resolved on each use.
+        @param gc_freeze: also move all objects to the permanent generation (gc.freeze)
+        @param timeout: (optional) time preload() waits for background vault loading,
+            default is vault_deadline
+        @return: self
+        """
+        from .preload import freeze
+
+        if not hasattr(self, "_preloaded_secrets"):
+            self.preload(timeout=timeout)
+        return freeze(self, gc_freeze=gc_freeze)
+
+    def vault_health(self):
+        """
+        Status of background vault loading (see vault.BackgroundSecrets)
+        @return: VaultHealth, or None unless created with vault_deadline=
+        """
+        from .vault import BackgroundSecrets
+
+        if isinstance(self.secret_manager, BackgroundSecrets):
+            return self.secret_manager.health()
+        return None
+
+    def prefetch_secrets(self, paths, budget: float = 5.0, max_workers: int = 8) -> dict:
+        """
+        Read vault secret paths concurrently into the secrets cache, so that
+        later lookups need no further round trips (see vault.prefetch_secrets)
+        @param paths: secret paths, relative to the vault base path, which is also
+            read (first) if not listed and no secrets have been read
+        @param budget: total time allowed in seconds
+        @param max_workers: maximum number of concurrent requests
+        @return: dict of path to read time in seconds, for each path read
+        """
+        from .vault import prefetch_secrets
+
+        return prefetch_secrets(
+            self.secret_manager, paths, budget=budget, max_workers=max_workers
+        )
+
+    def read_env(self, **kwargs):
+        if self._snapshot_path and self._load_snapshot(kwargs["environ"], kwargs):
+            self._env = self._snapshot.apply(
+                kwargs["environ"], update=kwargs.get("update", True)
+            )
+        else:
+            from .loader import load_env
+
+            if self._watching:
+                self._read_options = {k: v for k, v in kwargs.items() if k != "environ"}
+                self._read_base = dict(kwargs["environ"])
+            self._env = load_env(**kwargs)
+            if self._watching:
+                self._loaded = dict(self._env)
+        self._changed()
+
+    def reload(self):
+        """
+        Read the .env files again, applying only the variables that have changed in
+        them. Variables set by other means since they were read are kept.
+        Sends the signals.env_reloaded signal if any have changed.
+        @return: watch.EnvDiff of the variables added, changed and removed
+        """
+        if self._loaded is None:
+            raise ValueError("reload() requires an Env created with watch=")
+        from .watch import reload
+
+        return reload(self)
+
+    def _load_snapshot(self, environ, options) -> bool:
+        from .snapshot import Snapshot, fingerprint
+
+        self._snapshot_base = dict(environ)
+        key = fingerprint(environ, self.prefix, options)
+        snapshot = Snapshot.load(
+            self._snapshot_path,
+            lambda recorded: fingerprint(environ, self.prefix, options, recorded),
+        )
+        self._snapshot_loaded = snapshot is not None
+        self._snapshot = snapshot or Snapshot(key)
+        return self._snapshot_loaded
+
+    @property
+    def snapshot_loaded(self) -> bool:
+        """
+        True if values are being served from a valid snapshot
+        """
+        return self._snapshot_loaded
+
+    def save_snapshot(self, path=None):
+        """
+        Save everything resolved so far (environment, vault secrets and plugin
+        results) as a snapshot that later processes with the same inputs can load
+        @param path: (optional) snapshot file, default is the snapshot= path
+        """
+        path = path or self._snapshot_path
+        if not path or self._snapshot is None:
+            raise ValueError("save_snapshot() requires an Env created with snapshot=")
+        base = self._snapshot_base or {}
+        self._snapshot.environ = {k: v for k, v in self.env.items() if base.get(k) != v}
+        with contextlib.suppress(Exception):
+            self._snapshot.secrets = dict(self.secret_manager.get_secrets())
+        self._snapshot.save(path)
 
     def _with_prefix(self, var, prefix):
         if prefix is _USE_DEFAULT_PREFIX:
             prefix = self.prefix
-        if (
-            var
-            and prefix
-            and not (isinstance(var, str) and var.startswith(prefix))
-            and super().get(var, None) is None
-        ):
-            var = f"{prefix}{var}"
+        if var and prefix and not (isinstance(var, str) and var.startswith(prefix)):
+            # whether to add the prefix depends only on whether the raw var is set
+            resolved = self._prefixed.get(var)
+            if resolved is None:
+                resolved = self._prefixed[var] = {}
+            elif prefix in resolved:
+                name = resolved[prefix]
+                # the environment may be changed directly (e.g. os.environ), so the
+                # name is used only while the raw var is still set, or still unset
+                if (name == var) == (var in self.env):
+                    return name
+            if super().get(var, None) is None:
+                resolved[prefix] = name = f"{prefix}{var}"
+                self._share_wait(var, name)
+            else:
+                resolved[prefix] = var
+            return resolved[prefix]
         return var
 
+    def _share_wait(self, var, name):
+        """
+        The prefixed name is looked up for the same variable as the raw var, so it
+        doesn't wait for background vault loading again
+        """
+        from .vault import BackgroundSecrets
+
+        if isinstance(self.secret_manager, BackgroundSecrets):
+            self.secret_manager.share_wait(var, name)
+
+    @property
+    def generation(self) -> int:
+        """
+        Incremented whenever a variable is set or unset, values derived from
+        the environment are valid only for the generation they were read in
+        """
+        return self._generation
+
+    def _changed(self, var=None):
+        """
+        Called whenever var is set or unset, or all variables (var=None) may have changed
+        """
+        self._generation += 1
+        if var is None:
+            self._prefixed.clear()
+            self._typed.clear()
+            self._index = None
+        else:
+            self._prefixed.pop(var, None)
+            self._typed.pop(var, None)
+            if self._index is not None and isinstance(var, str):
+                if var in self.env or var in self._loaded_secrets():
+                    self._index.add(var)
+                else:
+                    self._index.discard(var)
+
+    def clear_caches(self):
+        """
+        Discard values derived from the environment, required only if the
+        underlying environment (e.g. os.environ) is modified directly
+        """
+        self._changed()
+
+    def set(self, var, value=None):
+        super().set(var, value)
+        if not isinstance(var, dict):
+            self._changed(var)
+
+    def setdefault(self, var, value) -> str | None:
+        result = super().setdefault(var, value)
+        self._changed(var)
+        return result
+
     def unset(self, var, prefix=_USE_DEFAULT_PREFIX):
-        super().unset(self._with_prefix(var, prefix=prefix))
+        var = self._with_prefix(var, prefix=prefix)
+        super().unset(var)
+        self._changed(var)
 
     def is_set(self, var, prefix=_USE_DEFAULT_PREFIX):
         return super().is_set(self._with_prefix(var, prefix=prefix))
@@ -81,7 +526,7 @@ class DjangoEnv(Env):
         def check_nested(v):
             if isinstance(v, (list, tuple)):
                 return all(check_nested(item) for item in v)
-            return self.is_set(self._with_prefix(v, prefix=prefix))
+            return self.is_set(v, prefix=prefix)
 
         return all(check_nested(v) for v in _vars)
 
@@ -98,22 +543,66 @@ class DjangoEnv(Env):
     def get(self, var, default=None, prefix=_USE_DEFAULT_PREFIX):
         return super().get(self._with_prefix(var, prefix=prefix), default=default)
 
-    def int(self, var, default=None, prefix=_USE_DEFAULT_PREFIX) -> int:
-        val = self.get(var, default=default, prefix=prefix)
+    def _typed_value(self, var, default, prefix, convert):
+        """
+        Return the converted value of var, caching it by resolved name, conversion and
+        default together with the raw value converted, so that the raw value is still
+        read on each call and a changed value (e.g. set in os.environ directly) is
+        converted again
+        """
+        name = self._with_prefix(var, prefix=prefix)
+        raw = self.get(var, default=default, prefix=prefix)
+        key = (convert, type(default), default)
+        try:
+            hash(key)
+        except TypeError:  # unhashable default, e.g. a list
+            return convert(self, raw)
+        values = self._typed.get(name)
+        cached = values.get(key) if values is not None else None
+        if cached is not None and type(cached[0]) is type(raw) and cached[0] == raw:
+            self._typed_hits += 1
+            value = cached[1]
+        else:
+            self._typed_misses += 1
+            value = convert(self, raw)
+            self._typed.setdefault(name, {})[key] = (raw, value)
+        # lists are mutable, so callers get their own copy
+        return value.copy() if isinstance(value, list) else value
+
+    def typed_cache_info(self) -> TypedCacheInfo:
+        """
+        Hit and miss counts of the int/float/bool/list conversion cache
+        """
+        return TypedCacheInfo(
+            self._typed_hits,
+            self._typed_misses,
+            sum(len(values) for values in self._typed.values()),
+        )
+
+    def _to_int(self, val):
         return self._int(val)
 
-    def float(self, var, default=None, prefix=_USE_DEFAULT_PREFIX) -> float:
-        val = self.get(var, default=default, prefix=prefix)
+    def _to_float(self, val):
         return self._float(val)
 
-    def bool(self, var, default=None, prefix=_USE_DEFAULT_PREFIX) -> bool:
-        val = self.get(var, default=default, prefix=prefix)
+    def _to_bool(self, val):
         return bool(val) if isinstance(val, (bool, int)) else self.is_true(val)
 
-    def list(self, var, default=None, prefix=_USE_DEFAULT_PREFIX) -> list:
-        val = self.get(var, default=default, prefix=prefix)
+    def _to_list(self, val):
         return val if isinstance(val, (list, tuple)) else self._list(val)
 
+    def int(self, var, default=None, prefix=_USE_DEFAULT_PREFIX) -> int:
+        return self._typed_value(var, default, prefix, DjangoEnv._to_int)
+
+    def float(self, var, default=None, prefix=_USE_DEFAULT_PREFIX) -> float:
+        return self._typed_value(var, default, prefix, DjangoEnv._to_float)
+
+    def bool(self, var, default=None, prefix=_USE_DEFAULT_PREFIX) -> bool:
+        return self._typed_value(var, default, prefix, DjangoEnv._to_bool)
+
+    def list(self, var, default=None, prefix=_USE_DEFAULT_PREFIX) -> list:
+        return self._typed_value(var, default, prefix, DjangoEnv._to_list)
+
     def check_var(self, var, default=None, prefix=_USE_DEFAULT_PREFIX, raise_error=True):
         """
         Override variable name to insert prefix unless the raw var is set
@@ -171,62 +660,106 @@ class DjangoEnv(Env):
             )
         return self.get(var, default=default, prefix=prefix)
 
-    @staticmethod
-    def _init_plugins():
+    def resolve_deferred(self, max_workers: int = 8) -> dict:
         """
-        Initialize all plugins in the plugin package
-        :return:
+        Resolve all outstanding deferred values created by env() concurrently,
+        typically before a worker starts accepting requests.
+        Values deferred by django-class-settings (DeferredEnv) are resolved when the
+        Settings class is created, so are never outstanding.
+        @param max_workers: maximum number of concurrent lookups
+        @return: dict of setting name to resolution time in seconds
         """
-        from . import plugin
+        from .deferred import deferred_settings, resolve_all
 
-        # noinspection PyProtectedMember
-        if not plugin._initialized:
-            import os
+        return resolve_all(deferred_settings(self), max_workers=max_workers)
 
-            package_path = plugin.__path__[0]  # Use the first path in the list
-            package_prefix = plugin.__name__
-            for filename in os.listdir(package_path):
-                if filename.endswith(".py") and not filename.startswith("_"):
-                    module_name = filename[:-3]  # Remove the .py extension
-                    module_name = f"{package_prefix}.{module_name}"
-                    spec = importlib.util.find_spec(module_name)
-                    if spec is not None:
-                        importlib.import_module(module_name)
+    def _get_backend(self, name, rplugin, url, kwargs):
+        if self._snapshot is None:
+            return rplugin.get_backend(url, **kwargs)
+        from .snapshot import Snapshot
+
+        # compute the key first, plugins may update the options passed
+        key = Snapshot.plugin_key(name, url, kwargs)
+        if key is None:
+            return rplugin.get_backend(url, **kwargs)
+        if (result := self._snapshot.plugin_result(key)) is None:
+            result = rplugin.get_backend(url, **kwargs)
+            self._snapshot.record_plugin(key, result)
+        return result
+
+    def _loaded_secrets(self):
+        """
+        Vault secrets read so far
+        """
+        try:
+            secrets = self.secret_manager.secrets
+        except Exception:
+            secrets = None
+        # the same empty mapping each time, so that the index is not rebuilt
+        return _NO_SECRETS if secrets is None else secrets
+
+    def _read_secrets(self):
+        """
+        Read the secrets from vault if none have been read yet, as envex's
+        SecretsManager reads them only when a lookup is first not found in the
+        environment. Done once for each secrets manager.
+        """
+        from envex.env_hvac import SecretsManager
+
+        manager = getattr(self, "secret_manager", None)
+        if manager is self._index_secrets:
+            return
+        self._index_secrets = manager
+        if isinstance(manager, SecretsManager) and not manager.secrets:
+            try:
+                manager.get_secrets()
+            except Exception as exc:
+                logger.warning(f"vault secrets could not be read: {exc}")
+
+    def _key_index(self):
+        """
+        Index of the names of all variables in the environment and in vault,
+        rebuilt if vault secrets have been read since it was built
+        """
+        from .namespace import KeyIndex
+
+        self._read_secrets()
+        secrets = self._loaded_secrets()
+        state = (id(secrets), len(secrets))
+        if self._index is None or self._index_state != state:
+            self._index = KeyIndex([*self.env.keys(), *secrets.keys()])
+            self._index_state = state
+        return self._index
+
+    def namespace(self, prefix: str):
+        """
+        Return a read-only view of the variables whose names start with prefix,
+        keyed by name without it, e.g. namespace("DJANGO_CACHE_")["TIMEOUT"].
+        The env's prefix is not added. Finding the names takes time proportional to
+        the number found, rather than to the size of the environment.
+        @param prefix: name prefix
+        @return: namespace.Namespace
+        """
+        from .namespace import Namespace
+
+        return Namespace(self, prefix)
 
     def __getattr__(self, name):
         """
         Handle calls to unknown methods by checking against registered plugins.
+        The plugin method is added to the class, so this is only called once per name.
         """
         from . import plugin
 
-        rplugin = plugin.get_plugin_from_name(name)
-        if rplugin is not None:
-            # virtual handler for plugins
-            def handler(
-                var=None,
-                *,
-                default=None,
-                backend=None,
-                engine=None,
-                prefix=_USE_DEFAULT_PREFIX,
-                **kwargs,
-            ):
-                if backend and engine:
-                    raise ValueError("You cannot specify both 'backend' and 'engine'")
-                if var is None:
-                    # Use the default value specified by the plugin if necessary
-                    var = getattr(rplugin, "VAR", None)
-                # Determine the URL using the check_var method
-                url = self.check_var(var, prefix=prefix, default=default)
-                # Call the registered plugin handler with the resolved arguments
-                kwargs["backend"] = backend
-                kwargs["engine"] = engine
-                kwargs = {k: v for k, v in kwargs.items() if v is not None}
-                return rplugin.get_backend(url, **kwargs)
-
-            # Cache the handler for future calls
-            self.__dict__[name] = handler
-            return handler
+        if (plugin_name := plugin.get_family_plugin_name(name)) is not None:
+            method = _family_method(plugin, name, plugin_name)
+            setattr(type(self), name, method)
+            return method.__get__(self, type(self))
+
+        if plugin.get_plugin_from_name(name) is not None:
+            method = _plugin_method(plugin, name)
+            setattr(type(self), name, method)
+            return method.__get__(self, type(self))
 
         # If no plugin matches, fallback to normal attribute handling
         raise AttributeError(
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+Loading .env files with shared discovery and parsing
+
+load_env() reads the same files and produces the same environment as
+envex.load_env, but finds them with the cached discovery.discover(), and parses
+each file only once per process: parsed contents are shared by every Env that
+reads the file, until the file's mtime, inode or size changes.
+
+Encrypted files are decrypted on every read, as key derivation is deliberately
+slow. With decrypt_cache, the decrypted content is also cached, keyed by a hash of
+the ciphertext and of the password (the key source), so that it is decrypted again
+whenever the encrypted file changes. It is held in memory and, if decrypt_cache is
+a directory, in a file there readable only by the owner, for other processes.
+That file is sealed with a key derived from the password by HKDF, which is fast
+to compute, so it is easier to guess a weak password from it than from the .env.enc
+file: the directory should be a private tmpfs (e.g. under /dev/shm or $XDG_RUNTIME_DIR).
+"""
+
+import functools
+import hashlib
+import logging
+import os
+import threading
+from collections import namedtuple
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, MutableMapping, Optional, Tuple, Union
+
+from envex import dot_env
+from envex.dot_env import DEFAULT_ENCODING
+from envex.env_crypto import MAGIC_BYTES, DecryptError
+
+from .discovery import discover, env_file_name, file_stamp, search_paths
+
+__all__ = (
+    "DecryptCacheInfo",
+    "FileCacheInfo",
+    "clear_decrypt_cache",
+    "clear_file_cache",
+    "decrypt_cache_info",
+    "env_files",
+    "file_cache_info",
+    "load_env",
+    "load_file",
+)
+
+FileCacheInfo = namedtuple("FileCacheInfo", "hits misses currsize")
+
+# path -> (file stamp, encoding, parsed lines)
+_parsed: Dict[str, Tuple[tuple, str, tuple]] = {}
+_parsed_lock = threading.Lock()
+_hits = _misses = 0
+
+DecryptCacheInfo = namedtuple("DecryptCacheInfo", "hits misses currsize")
+
+# path -> (ciphertext digest, key source digest, encoding, parsed lines)
+_decrypted: Dict[str, Tuple[bytes, bytes, str, tuple]] = {}
+_decrypt_hits = _decrypt_misses = 0
+_DECRYPT_CONTEXT = b"django-settings-env decrypted env"
+
+logger = logging.getLogger(__name__)
+
+# private envex functions the shared caches are built on (tested in test_loader);
+# should a release remove them, envex's own load_env is used, without the caches
+_ENVEX_INTERNALS = ("_process_line", "_post_process", "_update_os_env")
+_envex_internals = all(
+    callable(getattr(dot_env, name, None)) for name in _ENVEX_INTERNALS
+)
+
+
+def _parse(data: bytes, errors: bool, encoding: str, env_path: Path) -> tuple:
+    """
+    Parse .env content into (function, key, value) lines, as envex's _process_stream
+    """
+    lines = []
+    for lineno, line in enumerate(BytesIO(data).readlines(), start=1):
+        line = line.decode(encoding).strip()
+        if line and line[0] != "#":
+            lines.append(dot_env._process_line(lineno, line, errors, env_path))
+    return tuple(lines)
+
+
+@functools.lru_cache(maxsize=8)
+def _resolved_cwd(cwd: str) -> Path:
+    return Path(cwd).resolve(strict=True)
+
+
+def _cache_file(cache_dir: Union[str, Path], env_path: Path, digest: bytes) -> Path:
+    directory = str(cache_dir).format(uid=os.getuid() if hasattr(os, "getuid") else "")
+    path_hash = hashlib.sha256(str(env_path).encode("utf-8")).hexdigest()[:16]
+    return Path(directory) / f"{path_hash}-{digest.hex()[:32]}.env"
+
+
+def _read_cache_file(cache_file: Path, password: str) -> Optional[bytes]:
+    from .secrets_cache import unseal
+
+    try:
+        return unseal(password.encode("utf-8"), cache_file.read_bytes(), _DECRYPT_CONTEXT)
+    except (OSError, ImportError, ValueError) as exc:
+        # missing, or written with another password or format
+        if not isinstance(exc, FileNotFoundError):
+            logger.debug(f"decrypt cache {cache_file} not loaded: {exc}")
+        return None
+
+
+def _write_cache_file(cache_file: Path, password: str, plaintext: bytes):
+    from .secrets_cache import seal, write_private
+
+    try:
+        write_private(
+            cache_file, seal(password.encode("utf-8"), plaintext, _DECRYPT_CONTEXT)
+        )
+        # remove files for previous content of the same .env file
+        prefix = cache_file.name.split("-", 1)[0]
+        for stale in cache_file.parent.glob(f"{prefix}-*.env"):
+            if stale != cache_file:
+                stale.unlink(missing_ok=True)
+    except (OSError, ImportError) as exc:
+        logger.warning(f"decrypt cache {cache_file} not saved: {exc}")
+
+
+def _decrypted_lines(
+    env_path: Path,
+    data: bytes,
+    password: str,
+    errors: bool,
+    encoding: str,
+    decrypt_cache: Union[bool, str, Path],
+) -> Optional[tuple]:
+    """
+    Parsed lines of an encrypted file, decrypting it only if not cached
+    :return: parsed lines, or None if it could not be decrypted
+    """
+    global _decrypt_hits, _decrypt_misses
+    key = str(env_path)
+    digest = hashlib.sha256(data).digest()
+    key_source = hashlib.sha256(password.encode("utf-8")).digest()
+    entry = _decrypted.get(key)
+    if entry is not None and entry[:3] == (digest, key_source, encoding):
+        _decrypt_hits += 1
+        return entry[3]
+
+    _decrypt_misses += 1
+    cache_file = None
+    plaintext = None
+    if not isinstance(decrypt_cache, bool):
+        cache_file = _cache_file(decrypt_cache, env_path, digest)
+        plaintext = _read_cache_file(cache_file, password)
+    if plaintext is None:
+        from envex.env_crypto import decrypt_data
+
+        try:
+            plaintext = decrypt_data(BytesIO(data), password).getvalue()
+        except DecryptError:
+            return None
+        if cache_file is not None:
+            _write_cache_file(cache_file, password, plaintext)
+    lines = _parse(plaintext, errors, encoding, env_path)
+    with _parsed_lock:
+        _decrypted[key] = (digest, key_source, encoding, lines)
+    return lines
+
+
+def load_file(
+    env_path: Path,
+    environ: MutableMapping[str, str],
+    overwrite: bool,
+    errors: bool,
+    decrypt: bool,
+    password: Optional[str],
+    encoding: str,
+    decrypt_cache: Union[None, bool, str, Path] = None,
+):
+    """
+    Apply a .env file to environ, parsing it only if it has changed since last read
+    """
+    global _hits, _misses
+    key = str(env_path)
+    stamp = file_stamp(env_path)
+    entry = _parsed.get(key)
+    if entry is not None and entry[0] == stamp and entry[1] == encoding:
+        _hits += 1
+        lines = entry[2]
+    else:
+        with dot_env.open_env(env_path) as f:
+            data = f.read()
+        if isinstance(data, str):
+            data = data.encode(encoding)
+        if decrypt and password and data.startswith(MAGIC_BYTES):
+            # encrypted content depends on the password, so is cached separately
+            lines = None
+            if decrypt_cache:
+                lines = _decrypted_lines(
+                    env_path, data, password, errors, encoding, decrypt_cache
+                )
+            if lines is not None:
+                return _apply(lines, environ, overwrite)
+            return dot_env.load_stream(
+                BytesIO(data),
+                environ,
+                overwrite,
+                errors,
+                decrypt,
+                password,
+                encoding,
+                env_path,
+            )
+        _misses += 1
+        lines = _parse(data, errors, encoding, env_path)
+        if stamp is not None:
+            with _parsed_lock:
+                _parsed[key] = (stamp, encoding, lines)
+    _apply(lines, environ, overwrite)
+
+
+def _apply(lines: tuple, environ: MutableMapping[str, str], overwrite: bool):
+    for func, name, value in lines:
+        if func is not None:
+            func(environ, name, value, overwrite=overwrite)
+
+
+def _candidates(env_file, search_path, overwrite, parents, decrypt, cwd) -> tuple:
+    files = discover(env_file, search_paths(search_path, overwrite), parents, decrypt)
+    # envex finally tries env_file relative to the working directory, which
+    # only needs resolving (for symbolic links) if it exists
+    last = cwd / env_file
+    if file_stamp(last) is not None:
+        last = last.resolve()
+    return (*files, last)
+
+
+def env_files(
+    env_file: str = None,
+    search_path: Union[None, Union[List[str], List[Path]], str] = None,
+    environ: MutableMapping[str, str] = None,
+    overwrite: bool = False,
+    parents: bool = False,
+    decrypt: bool = False,
+    **_kwargs,
+) -> List[Path]:
+    """
+    The files load_env() reads with these arguments, in the order read
+    """
+    env_file = env_file_name(env_file, os.environ if environ is None else environ)
+    cwd = _resolved_cwd(os.getcwd())
+    return [
+        path
+        for path in _candidates(env_file, search_path, overwrite, parents, decrypt, cwd)
+        if file_stamp(path) is not None
+    ]
+
+
+def load_env(
+    env_file: str = None,
+    search_path: Union[None, Union[List[str], List[Path]], str] = None,
+    environ: MutableMapping[str, str] = None,
+    overwrite: bool = False,
+    parents: bool = False,
+    update: bool = True,
+    errors: bool = False,
+    working_dirs: bool = True,
+    decrypt: bool = False,
+    password: str = None,
+    encoding: Optional[str] = DEFAULT_ENCODING,
+    decrypt_cache: Union[None, bool, str, Path] = None,
+) -> MutableMapping[str, str]:
+    """
+    Equivalent of envex.load_env (see there for other arguments), using shared caches
+    :param decrypt_cache: cache decrypted content of encrypted files in memory if
+        True, or also in files in this directory ("{uid}" is replaced by the user id)
+    """
+    if errors or not _envex_internals:
+        # envex raises FileNotFoundError after the search whenever errors is set
+        return dot_env.load_env(
+            env_file,
+            search_paths(search_path),
+            environ,
+            overwrite,
+            parents,
+            update,
+            errors,
+            working_dirs,
+            decrypt,
+            password,
+            encoding,
+        )
+    if environ is None:
+        environ = os.environ
+    env_file = env_file_name(env_file, environ)
+    cwd = _resolved_cwd(os.getcwd())
+    if working_dirs:
+        environ["CWD"] = cwd.as_posix()
+    environ = environ.copy()
+    for env_path in _candidates(env_file, search_path, overwrite, parents, decrypt, cwd):
+        if working_dirs:
+            environ["PWD"] = str(env_path.parent)
+        try:
+            # a module global, so that tracing can wrap it
+            load_file(
+                env_path,
+                environ,
+                overwrite,
+                errors,
+                decrypt,
+                password,
+                encoding,
+                decrypt_cache,
+            )
+        except FileNotFoundError:
+            pass
+    environ = dot_env._post_process(environ)
+    return dot_env._update_os_env(environ) if update else environ
+
+
+def file_cache_info() -> FileCacheInfo:
+    return FileCacheInfo(_hits, _misses, len(_parsed))
+
+
+def clear_file_cache():
+    global _hits, _misses
+    with _parsed_lock:
+        _parsed.clear()
+        _hits = _misses = 0
+
+
+def decrypt_cache_info() -> DecryptCacheInfo:
+    return DecryptCacheInfo(_decrypt_hits, _decrypt_misses, len(_decrypted))
+
+
+def clear_decrypt_cache():
+    """
+    Discard decrypted content cached in memory (files are replaced when stale)
+    """
+    global _decrypt_hits, _decrypt_misses
+    with _parsed_lock:
+        _decrypted.clear()
+        _decrypt_hits = _decrypt_misses = 0
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import glob
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Report settings reads and deferred value resolutions recorded by the access "
+        "counters, from SETTINGS_ENV_ACCESS_FILE files or the files given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="*", help="counter files written at exit")
+        parser.add_argument(
+            "--top", type=int, default=20, help="number of settings to list (default 20)"
+        )
+
+    def _load(self, files):
+        if not files and (pattern := getattr(settings, "SETTINGS_ENV_ACCESS_FILE", None)):
+            files = sorted(glob.glob(pattern.replace("{pid}", "*")))
+        reports = []
+        for path in files:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    reports.append(json.load(f))
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"{path}: {exc}") from exc
+        if not reports and (active := counters.counters()) is not None:
+            reports.append(active.as_dict())
+        if not reports:
+            raise CommandError(
+                "no access counters found, see SETTINGS_ENV_ACCESS_COUNTERS"
+            )
+        return reports
+
+    def handle(self, *args, **options):
+        reports = self._load(options["files"])
+        reads, resolutions = {}, {}
+        unused = set(reports[0]["unused"])
+        for report in reports:
+            for name, count in report["reads"].items():
+                reads[name] = reads.get(name, 0) + count
+            for name, entry in report["resolutions"].items():
+                total = resolutions.setdefault(name, {"count": 0, "seconds": 0.0})
+                total["count"] += entry["count"]
+                total["seconds"] += entry["seconds"]
+            # only unused if unused by every process
+            unused &= set(report["unused"])
+
+        top = options["top"]
+        self.stdout.write(f"Settings reads ({len(reports)} process(es)):")
+        for name, count in sorted(reads.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f"  {name:<40} {count:>12}")
+        self.stdout.write("Deferred resolutions:")
+        ranked = sorted(resolutions.items(), key=lambda item: -item[1]["seconds"])
+        for name, entry in ranked[:top]:
+            ms = entry["seconds"] * 1000
+            self.stdout.write(f"  {name:<40} {entry['count']:>6} {ms:10.1f}ms")
+        self.stdout.write("Deferred settings never read:")
+        for name in sorted(unused):
+            self.stdout.write(f"  {name}")
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Prefix index and namespace views over a DjangoEnv
+
+A KeyIndex holds the names of all variables, from the environment and from vault
+(whose secrets are read when the index is built, if no lookup has read them yet),
+sorted so that those starting with a prefix are found by binary search, in time
+proportional to the number found rather than to the size of the environment.
+A DjangoEnv builds its index when first needed, and keeps it current as variables
+are set, unset or reloaded.
+
+A Namespace is a read-only mapping of the variables under a prefix, keyed by name
+without the prefix, e.g. env.namespace("DJANGO_CACHE_")["TIMEOUT"].
+"""
+
+from bisect import bisect_left
+from collections.abc import Mapping
+from typing import Iterable, Iterator, List
+
+__all__ = (
+    "KeyIndex",
+    "Namespace",
+)
+
+
+class KeyIndex:
+    """
+    Sorted variable names, for prefix range queries
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._keys: List[str] = sorted({name for name in names if isinstance(name, str)})
+
+    def add(self, name: str):
+        i = bisect_left(self._keys, name)
+        if i == len(self._keys) or self._keys[i] != name:
+            self._keys.insert(i, name)
+
+    def discard(self, name: str):
+        i = bisect_left(self._keys, name)
+        if i < len(self._keys) and self._keys[i] == name:
+            del self._keys[i]
+
+    def range(self, prefix: str) -> List[str]:
+        """
+        Return the names starting with prefix, in sorted order
+        """
+        if not prefix:
+            return list(self._keys)
+        lo = bisect_left(self._keys, prefix)
+        # names with the prefix sort before the prefix with its last character
+        # incremented, unless that is the largest possible character
+        last = ord(prefix[-1])
+        if last < 0x10FFFF:
+            hi = bisect_left(self._keys, prefix[:-1] + chr(last + 1), lo)
+        else:
+            hi = lo
+            while hi < len(self._keys) and self._keys[hi].startswith(prefix):
+                hi += 1
+        return self._keys[lo:hi]
+
+    def __contains__(self, name) -> bool:
+        i = bisect_left(self._keys, name)
+        return i < len(self._keys) and self._keys[i] == name
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._keys))
+
+
+class Namespace(Mapping):
+    """
+    Read-only view of the variables of an env whose names start with a prefix,
+    keyed by name without the prefix. The view is live, so variables set or
+    unset later are included or excluded.
+    """
+
+    def __init__(self, env, prefix: str):
+        self._env = env
+        self._prefix = prefix
+
+    @property
+    def prefix(self) -> str:
+        return self._prefix
+
+    def _names(self) -> List[str]:
+        return self._env._key_index().range(self._prefix)
+
+    def __getitem__(self, key: str) -> str:
+        value = self._env.get(f"{self._prefix}{key}", prefix="")
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and f"{self._prefix}{key}" in self._env._key_index()
+
+    def __iter__(self) -> Iterator[str]:
+        start = len(self._prefix)
+        return (name[start:] for name in self._names())
+
+    def __len__(self) -> int:
+        return len(self._names())
+
+    def namespace(self, prefix: str) -> "Namespace":
+        """
+        Return the namespace of the variables under a further prefix
+        """
+        return Namespace(self._env, f"{self._prefix}{prefix}")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._prefix!r}, {list(self)!r})"
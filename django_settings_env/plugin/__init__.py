@@ -1,9 +1,27 @@
 import contextlib
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sys
+import tempfile
 from abc import ABC, abstractmethod
-from typing import Dict, Type, Any
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Type, Any
 import threading
 
-__all__ = ("EnvPlugin", "ConfigDict", "register_plugin")
+__all__ = (
+    "EnvPlugin",
+    "ConfigDict",
+    "register_plugin",
+    "PLUGIN_MANIFEST",
+    "FAMILY_MANIFEST",
+    "DEFAULT_ALIAS",
+    "PLUGIN_ENTRY_POINT_GROUP",
+    "entry_point_index",
+)
 
 from ..parser import ParsedUrl, default_parser
 
@@ -59,8 +77,14 @@ def convert_values(options: dict):
             options[k] = float(v)
 
 
+# alias of the plugin's default variable (e.g. DATABASE_URL) in a family
+DEFAULT_ALIAS = "default"
+
+
 class EnvPlugin(ABC):
     DEFAULT_SCHEME = "https"
+    # DjangoEnv method returning the configuration of every alias, e.g. "databases"
+    FAMILY = None
 
     @property
     def parser(self):
@@ -74,19 +98,84 @@ class EnvPlugin(ABC):
         # Return a Django object or dictionary
         pass
 
+    def family_prefixes(self, prefix: str | None) -> tuple:
+        """
+        Name prefixes of the variables family_aliases() may match
+        """
+        start = f"{self.VAR.rpartition('_')[0]}_"
+        return (start, f"{prefix}{start}") if prefix else (start,)
+
+    def family_aliases(self, names: Iterable[str], prefix: str | None) -> Dict[str, str]:
+        """
+        Find the variable of each alias among names: VAR (e.g. DATABASE_URL) for
+        DEFAULT_ALIAS, and VAR with the alias inserted (e.g. DATABASE_REPLICA_URL)
+        for others. Names may have the prefix, but where a variable is set both with
+        and without it, the unprefixed one is used, as for other lookups.
+        :return: dict of lower case alias to variable name
+        """
+        head, _, tail = self.VAR.rpartition("_")
+        start, end = f"{head}_", f"_{tail}"
+        aliases = {}
+        for name in names:
+            var = name[len(prefix) :] if prefix and name.startswith(prefix) else name
+            if var == self.VAR:
+                alias = DEFAULT_ALIAS
+            elif (
+                len(var) > len(start) + len(end)
+                and var.startswith(start)
+                and var.endswith(end)
+            ):
+                alias = var[len(start) : -len(end)].lower()
+            else:
+                continue
+            if var == name or alias not in aliases:
+                aliases[alias] = name
+        return aliases
+
+
+# DjangoEnv method name -> plugin module, each module is imported on first use
+PLUGIN_MANIFEST = {
+    "cache_url": "plugin_cache",
+    "database_url": "plugin_database",
+    "email_url": "plugin_email",
+    "queue_url": "plugin_queue",
+    "search_url": "plugin_search",
+    "tasks_url": "plugin_tasks",
+}
 
-_initialized = False
-_registered_plugins: Dict = {}
+# DjangoEnv family method name -> plugin method name, for the plugins above with a FAMILY;
+# kept in step with each plugin's FAMILY so families resolve without importing every
+# plugin. email_url and tasks_url have none: Django configures a single email backend,
+# and tasks_url reads CACHE_URL, so its aliases would be those of caches
+FAMILY_MANIFEST = {
+    "caches": "cache_url",
+    "databases": "database_url",
+    "queues": "queue_url",
+    "search_connections": "search_url",
+}
+
+# third-party plugins are published as entry points in this group, named by the
+# DjangoEnv method they handle, e.g. "vault_url = mypackage.plugins:VaultPlugin"
+PLUGIN_ENTRY_POINT_GROUP = "django_settings_env.plugins"
+# set to a file path to cache the entry point index across processes
+PLUGIN_CACHE_VAR = "DJANGO_SETTINGS_ENV_PLUGIN_CACHE"
+
+logger = logging.getLogger(__name__)
+
+# read without locking: registration replaces the mapping rather than modifying it
+_registered_plugins: Mapping[str, EnvPlugin] = MappingProxyType({})
 _registered_plugins_lock = threading.Lock()
+# separate (re-entrant) lock, as plugin modules register themselves on import
+_load_plugins_lock = threading.RLock()
 
 
 def _register_plugin(plugin_cls: type[EnvPlugin], name: str):
     if not issubclass(plugin_cls, EnvPlugin):
         raise TypeError(f"{plugin_cls.__name__} must implement EnvPlugin")
+    global _registered_plugins
+    instance = plugin_cls()
     with _registered_plugins_lock:
-        global _initialized
-        _registered_plugins[name] = plugin_cls()
-        _initialized = True
+        _registered_plugins = MappingProxyType({**_registered_plugins, name: instance})
 
 
 def register_plugin(name: str):
@@ -107,6 +196,123 @@ def register_plugin(name: str):
     return decorator  # Return the parser class itself
 
 
+_entry_point_index: Dict[str, str] | None = None
+
+
+def _distributions_fingerprint() -> str:
+    # installed distributions are identified by their metadata directories, so this
+    # only lists sys.path entries rather than reading every entry_points.txt
+    digest = hashlib.sha256()
+    for entry in sys.path:
+        try:
+            with os.scandir(entry or ".") as it:
+                found = [
+                    (e.name, e.stat().st_mtime_ns)
+                    for e in it
+                    if e.name.endswith((".dist-info", ".egg-info"))
+                ]
+        except OSError:
+            continue
+        digest.update(json.dumps([entry, sorted(found)]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _index_cache_file() -> Path | None:
+    # only where configured, as a plugin lookup should not write to the user's home
+    path = os.environ.get(PLUGIN_CACHE_VAR)
+    return Path(path) if path else None
+
+
+def _read_index_cache(cache_file: Path, fingerprint: str) -> Dict | None:
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("fingerprint") != fingerprint:
+        return None
+    return data.get("plugins")
+
+
+def _write_index_cache(cache_file: Path, fingerprint: str, index: Dict):
+    # the cache is an optimisation only, so any failure to write it is ignored
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=cache_file.parent, prefix=".entry-points.")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "plugins": index}, f)
+        os.replace(tmp_name, cache_file)
+    except OSError as exc:
+        logger.debug(f"plugin entry point index not cached: {exc}")
+
+
+def _read_entry_points() -> Dict[str, str]:
+    from importlib.metadata import entry_points
+
+    return {ep.name: ep.value for ep in entry_points(group=PLUGIN_ENTRY_POINT_GROUP)}
+
+
+def entry_point_index(refresh: bool = False) -> Dict[str, str]:
+    """
+    Return the plugin entry point index, mapping method name -> entry point value.
+    The index is built once per process and, if PLUGIN_CACHE_VAR names a cache file,
+    reused across processes for as long as the installed distributions are unchanged.
+    :param refresh: rebuild the index, e.g. after installing a plugin at runtime
+    """
+    global _entry_point_index
+    with _load_plugins_lock:
+        if _entry_point_index is None or refresh:
+            index = fingerprint = None
+            if (cache_file := _index_cache_file()) is not None:
+                fingerprint = _distributions_fingerprint()
+                if not refresh:
+                    index = _read_index_cache(cache_file, fingerprint)
+            if index is None:
+                index = _read_entry_points()
+                if cache_file is not None:
+                    _write_index_cache(cache_file, fingerprint, index)
+            _entry_point_index = index
+        return _entry_point_index
+
+
+def _load_entry_point(name: str):
+    from importlib.metadata import EntryPoint
+
+    if (value := entry_point_index().get(name)) is None:
+        return
+    loaded = EntryPoint(name, value, PLUGIN_ENTRY_POINT_GROUP).load()
+    # the entry point may name a module or class that registers itself via
+    # @register_plugin, or an undecorated EnvPlugin subclass
+    if name not in _registered_plugins and isinstance(loaded, type):
+        _register_plugin(loaded, name)
+
+
+def _load_plugin(name: str) -> EnvPlugin | None:
+    module = PLUGIN_MANIFEST.get(name)
+    if module is None and name.startswith("_"):
+        return None
+    with _load_plugins_lock:
+        if name not in _registered_plugins:
+            if module is not None:
+                importlib.import_module(f"{__name__}.{module}")
+            else:
+                _load_entry_point(name)
+    return _registered_plugins.get(name)
+
+
 def get_plugin_from_name(name: str) -> EnvPlugin:
-    with _registered_plugins_lock:
-        return _registered_plugins.get(name)
+    rplugin = _registered_plugins.get(name)
+    return rplugin if rplugin is not None else _load_plugin(name)
+
+
+def get_family_plugin_name(family: str) -> str | None:
+    """
+    Return the plugin method name for a family method name, if any
+    """
+    name = FAMILY_MANIFEST.get(family)
+    if name is None and not family.startswith("_"):
+        # registered third-party plugins may also declare a FAMILY
+        name = next(
+            (n for n, p in _registered_plugins.items() if p.FAMILY == family), None
+        )
+    return name
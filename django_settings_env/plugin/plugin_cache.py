@@ -32,6 +32,7 @@ class CachePlugin(EnvPlugin):
     """
 
     VAR = "CACHE_URL"
+    FAMILY = "caches"
     CONTEXTS = ["caches"]
 
     def get_backend(self, url: str, **kwargs) -> object:  # noqa: C901
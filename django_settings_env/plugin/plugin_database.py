@@ -57,6 +57,7 @@ class DatabasePlugin(EnvPlugin):
     """
 
     VAR = "DATABASE_URL"
+    FAMILY = "databases"
     CONTEXTS = ["database"]
 
     def get_backend(self, url: str, **kwargs) -> object:
@@ -17,6 +17,7 @@ class QueuePlugin(EnvPlugin):
     """
 
     VAR = "QUEUE_URL"
+    FAMILY = "queues"
     CONTEXTS = ["queues"]
 
     def get_backend(self, url: str, **kwargs) -> object:  # noqa: C901
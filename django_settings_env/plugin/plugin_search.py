@@ -25,6 +25,7 @@ class SearchPlugin(EnvPlugin):
     """
 
     VAR = "SEARCH_URL"
+    FAMILY = "search_connections"
     CONTEXTS = ["search"]
 
     def get_backend(self, url: str, **kwargs: Any) -> object:  # noqa: C901
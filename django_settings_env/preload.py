@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Pre-fork preloading
+
+With a pre-forking server (e.g. gunicorn --preload), the master process can
+resolve everything a DjangoEnv provides (.env files, vault secrets, prefixed
+names, deferred settings and plugin results) and freeze it before forking.
+Workers then share the frozen state copy-on-write, and an Env() created with the
+same arguments in a worker returns the frozen instance rather than searching for
+and reading .env files and contacting vault again.
+
+Frozen state is held in read-only containers that are never modified, and
+gc.freeze() moves it (and everything else allocated so far) out of the garbage
+collector's reach, so collections in the workers don't write to its pages.
+Reading an object still updates its reference count (before Python 3.12 there
+are no immortal objects), so pages holding frequently read values may still be
+copied; what is avoided is the wholesale copying caused by the collector and by
+rebuilding the environment in each worker.
+"""
+
+import contextlib
+import copy
+import gc
+import hashlib
+import logging
+import sys
+import threading
+from types import MappingProxyType
+from typing import Dict, Iterable
+
+from envex import Env
+
+from .env_django import _USE_DEFAULT_PREFIX
+
+__all__ = (
+    "FrozenEnvMixin",
+    "clear_frozen_envs",
+    "freeze",
+    "frozen_class",
+    "frozen_env",
+    "init_args",
+    "preload",
+)
+
+logger = logging.getLogger(__name__)
+
+# (class, hash of arguments) -> frozen instance, read without locking on construction
+_frozen: Dict[tuple, object] = {}
+_frozen_lock = threading.Lock()
+
+
+# constructor arguments retained only as a digest
+_SECRET_ARGS = ("password", "token")
+
+
+def _copy(name, value):
+    if name in _SECRET_ARGS and isinstance(value, str):
+        return hashlib.sha256(value.encode()).hexdigest()
+    return dict(value) if isinstance(value, dict) else value
+
+
+def init_args(cls, args, kwargs) -> tuple:
+    """
+    Record an Env's class and arguments on construction, copying dicts (e.g.
+    environ) as these are modified afterwards, and keeping only a digest of
+    secrets (password, token)
+    """
+    return (
+        cls,
+        tuple(_copy(None, arg) for arg in args),
+        {k: _copy(k, v) for k, v in kwargs.items()},
+    )
+
+
+def _key(cls, args, kwargs) -> tuple | None:
+    # only computed by freeze(), and when looking up a frozen instance
+    try:
+        arguments = repr((args, sorted(kwargs.items(), key=lambda item: item[0])))
+    except Exception:  # arguments with a broken repr
+        return None
+    return cls, hashlib.sha256(arguments.encode()).hexdigest()
+
+
+def frozen_env(cls, args, kwargs):
+    """
+    Return the frozen instance created with these arguments, if any
+    """
+    if not _frozen or (key := _key(*init_args(cls, args, kwargs))) is None:
+        return None
+    return _frozen.get(key)
+
+
+def clear_frozen_envs():
+    """
+    Forget frozen instances, so that Env() creates a new instance again
+    """
+    with _frozen_lock:
+        _frozen.clear()
+
+
+def preload(env, plugins: Iterable[str] | None = None, timeout: float | None = None):
+    """
+    Resolve everything env provides (see DjangoEnv.preload)
+    """
+    from . import plugin as plugin_module
+    from .snapshot import Snapshot
+    from .vault import BackgroundSecrets
+
+    if isinstance(env.secret_manager, BackgroundSecrets) and not (
+        env.secret_manager.wait(timeout)
+    ):
+        logger.warning(
+            f"preload: vault secrets not read within {timeout}s,"
+            f" using the {len(env.secret_manager.secrets)} available"
+        )
+        # stop loading, so that resolving values below doesn't wait for each key
+        env.secret_manager.close()
+    secrets = {}
+    with contextlib.suppress(Exception):
+        secrets = env.secret_manager.secrets or env.secret_manager.get_secrets()
+    env._preloaded_secrets = dict(secrets)
+
+    # resolve the prefixed name of every variable in the environment or vault
+    prefix = env.prefix
+    for name in (*env.env.keys(), *secrets.keys()):
+        var = name[len(prefix) :] if prefix and name.startswith(prefix) else name
+        env._with_prefix(var, prefix=prefix)
+
+    env.resolve_deferred()
+    env._key_index()
+
+    if plugins is None:
+        plugins = dict.fromkeys(
+            [*plugin_module.PLUGIN_MANIFEST, *plugin_module._registered_plugins]
+        )
+    results = {}
+    for name in plugins:
+        rplugin = plugin_module.get_plugin_from_name(name)
+        var = getattr(rplugin, "VAR", None)
+        if not var or env.get(var) is None:
+            continue
+        url = env.check_var(var)
+        key = Snapshot.plugin_key(name, url, {})
+        try:
+            results[key] = rplugin.get_backend(url)
+        except Exception as exc:
+            logger.debug(f"preload: {name} not preloaded: {exc}")
+    env._plugin_results = results
+    return env
+
+
+def _frozen_container(values: Dict) -> MappingProxyType:
+    # interned keys share storage with the names used to look them up
+    return MappingProxyType(
+        {sys.intern(k) if isinstance(k, str) else k: v for k, v in values.items()}
+    )
+
+
+def freeze(env, gc_freeze: bool = True):
+    """
+    Freeze a preloaded env (see DjangoEnv.freeze)
+    """
+    from .snapshot import SnapshotSecrets
+
+    from .vault import BackgroundSecrets
+
+    if env.watcher is not None:
+        # a frozen env is never reloaded
+        env.watcher.close(timeout=0)
+        env.watcher = None
+    if isinstance(env.secret_manager, BackgroundSecrets):
+        # nor are secrets read later used
+        env.secret_manager.close()
+    env._env = _frozen_container(env.env)
+    env.secret_manager = SnapshotSecrets(_frozen_container(env._preloaded_secrets))
+    env._prefixed = _frozen_container(
+        {var: MappingProxyType(names) for var, names in env._prefixed.items()}
+    )
+    env._typed = _frozen_container(
+        {name: MappingProxyType(values) for name, values in env._typed.items()}
+    )
+    env._plugin_results = MappingProxyType(env._plugin_results)
+    del env._preloaded_secrets
+    # rebuilt for the frozen secrets, so that workers share it
+    env._index = None
+    env._key_index()
+    env.__class__ = frozen_class(type(env))
+
+    if (args := env.__dict__.pop("_init_args", None)) and (key := _key(*args)):
+        with _frozen_lock:
+            _frozen[key] = env
+    if gc_freeze:
+        gc.collect()
+        gc.freeze()
+    return env
+
+
+class FrozenEnvMixin:
+    """
+    Overrides of DjangoEnv methods for a frozen instance, which serve values from
+    its frozen state and never modify it
+    """
+
+    def __init__(self, *args, **kwargs):
+        # returned by Env() for the arguments it was created with, already initialised
+        pass
+
+    def _frozen_error(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is frozen and can't be modified")
+
+    set = setdefault = unset = read_env = read_streams = clear_caches = reload = (
+        _frozen_error
+    )
+
+    def _changed(self, var=None):
+        # frozen state is never invalidated (e.g. by background vault loading)
+        pass
+
+    def preload(self, *args, **kwargs):
+        return self
+
+    def freeze(self, *args, **kwargs):
+        return self
+
+    def _with_prefix(self, var, prefix):
+        if prefix is _USE_DEFAULT_PREFIX:
+            prefix = self.prefix
+        if var and prefix and not (isinstance(var, str) and var.startswith(prefix)):
+            resolved = self._prefixed.get(var)
+            if resolved is not None and prefix in resolved:
+                return resolved[prefix]
+            return f"{prefix}{var}" if Env.get(self, var, None) is None else var
+        return var
+
+    def _typed_value(self, var, default, prefix, convert):
+        values = self._typed.get(self._with_prefix(var, prefix=prefix))
+        if values is not None:
+            with contextlib.suppress(KeyError, TypeError):
+                # the frozen environment can't change, so the raw value is not compared
+                _raw, value = values[(convert, type(default), default)]
+                return value.copy() if isinstance(value, list) else value
+        return convert(self, self.get(var, default=default, prefix=prefix))
+
+    def _get_backend(self, name, rplugin, url, kwargs):
+        from .snapshot import Snapshot
+
+        key = Snapshot.plugin_key(name, url, kwargs)
+        if key is not None and key in self._plugin_results:
+            # callers may modify the result, so each gets its own copy
+            return copy.deepcopy(self._plugin_results[key])
+        return rplugin.get_backend(url, **kwargs)
+
+
+_frozen_classes = {}
+
+
+def frozen_class(cls: type) -> type:
+    """
+    Return the frozen subclass of a DjangoEnv class
+    """
+    if issubclass(cls, FrozenEnvMixin):
+        return cls
+    frozen = _frozen_classes.get(cls)
+    if frozen is None:
+        frozen = _frozen_classes.setdefault(
+            cls, type(f"Frozen{cls.__name__}", (FrozenEnvMixin, cls), {})
+        )
+    return frozen
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+Encrypted local cache of vault secrets
+
+Every process of a deployment typically reads the same vault secrets at startup.
+A SecretsCache persists them to a local file, so that other processes on the same
+host can reuse them for a limited time (the TTL), and can fall back to them when
+vault is slow or unavailable.
+
+The file is encrypted with AES-256-GCM (pycryptodome, as used by envex for .env.enc
+files). The key is derived from the vault token with HKDF rather than a password
+KDF: the token is already a high entropy secret, and derivation must be fast as
+every process does it. A cache is ignored if the token, the vault identity (url,
+mount point, base path and secret paths) or the cache format version differ.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import secrets
+import struct
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+__all__ = (
+    "CACHE_VERSION",
+    "CachedSecrets",
+    "SecretsCache",
+    "seal",
+    "unseal",
+    "write_private",
+)
+
+CACHE_VERSION = 1
+
+MAGIC_BYTES = b"DSEV"
+_HEADER = struct.Struct(">4sB16s12s")
+_TAG_LENGTH = 16
+_CONTEXT = b"django-settings-env vault cache"
+
+logger = logging.getLogger(__name__)
+
+
+def _key(secret: bytes, salt: bytes, context: bytes) -> bytes:
+    from Crypto.Hash import SHA256
+    from Crypto.Protocol.KDF import HKDF
+
+    return HKDF(secret, 32, salt, SHA256, context=context)
+
+
+def seal(secret: bytes, data: bytes, context: bytes = _CONTEXT) -> bytes:
+    """
+    Encrypt and authenticate data with a key derived from secret
+    """
+    from Crypto.Cipher import AES
+
+    salt, nonce = secrets.token_bytes(16), secrets.token_bytes(12)
+    header = _HEADER.pack(MAGIC_BYTES, CACHE_VERSION, salt, nonce)
+    cipher = AES.new(_key(secret, salt, context), AES.MODE_GCM, nonce=nonce)
+    cipher.update(header)
+    ciphertext, tag = cipher.encrypt_and_digest(data)
+    return header + tag + ciphertext
+
+
+def unseal(secret: bytes, data: bytes, context: bytes = _CONTEXT) -> bytes:
+    """
+    Decrypt data sealed by seal(), raising ValueError if it is of another format
+    version, or was sealed with another secret or context, or has been modified
+    """
+    from Crypto.Cipher import AES
+
+    header, body = data[: _HEADER.size], data[_HEADER.size :]
+    try:
+        magic, version, salt, nonce = _HEADER.unpack(header)
+    except struct.error as exc:
+        raise ValueError("truncated") from exc
+    if magic != MAGIC_BYTES or version != CACHE_VERSION:
+        raise ValueError("unsupported format")
+    cipher = AES.new(_key(secret, salt, context), AES.MODE_GCM, nonce=nonce)
+    cipher.update(header)
+    return cipher.decrypt_and_verify(body[_TAG_LENGTH:], body[:_TAG_LENGTH])
+
+
+def write_private(path: Path, data: bytes):
+    """
+    Atomically write a file readable by the owner only (mkstemp creates it 0600)
+    """
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
+
+class CachedSecrets:
+    """
+    Stand-in for envex's SecretsManager, serving secrets read from a SecretsCache
+    without contacting vault. Other SecretsManager methods are passed to the
+    underlying SecretsManager.
+    """
+
+    def __init__(self, secret_manager, secrets: Dict[str, str]):
+        self._manager = secret_manager
+        self._secrets = secrets
+
+    @property
+    def secrets(self) -> dict:
+        return self._secrets
+
+    def get_secrets(self, path: str = "") -> dict:
+        if not path:
+            return self._secrets
+        return self._manager.get_secrets(path)
+
+    def get_secret(self, key: str, default: str | None = None, error: bool = False):
+        if key in self._secrets:
+            return self._secrets[key]
+        if error and default is None:
+            raise KeyError(key)
+        return default
+
+    def list_secrets(self, _path: str = ""):
+        yield from self._secrets.keys()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._manager, name)
+
+
+class SecretsCache:
+    """
+    Encrypted file holding the secrets read from vault, with the time they were read
+    """
+
+    def __init__(self, path: str | Path, token: str, identity: Dict, ttl: float = 300):
+        """
+        :param path: cache file path, "{uid}" is replaced by the user id
+        :param token: vault token the key is derived from
+        :param identity: vault url, mount point, base path and paths (see identity())
+        :param ttl: time in seconds for which the cached secrets are current
+        """
+        self.path = Path(
+            str(path).format(uid=os.getuid() if hasattr(os, "getuid") else "")
+        )
+        self.ttl = ttl
+        self._token = token.encode("utf-8")
+        self._identity = hashlib.sha256(
+            json.dumps(identity, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    @staticmethod
+    def identity(options: Dict, paths: Iterable[str]) -> Dict:
+        """
+        Identify the secrets read, from the vault options passed to Env and the paths
+        """
+        return {
+            "url": options.get("url") or os.getenv("VAULT_ADDR"),
+            "engine": options.get("engine"),
+            "mount_point": options.get("mount_point"),
+            "base_path": options.get("base_path") or os.getenv("VAULT_PATH", ""),
+            "paths": list(paths),
+        }
+
+    def load(self) -> Tuple[Dict[str, str], float] | None:
+        """
+        Read the cache, whether or not it has expired
+        :return: tuple of the secrets and their age in seconds, or None if the
+            cache is missing, unreadable or does not match the current vault
+        """
+        try:
+            data = json.loads(unseal(self._token, self.path.read_bytes()))
+        except (OSError, ImportError, ValueError) as exc:
+            logger.debug(f"vault cache {self.path} not loaded: {exc}")
+            return None
+        if data.get("identity") != self._identity:
+            logger.debug(f"vault cache {self.path} ignored: different vault or paths")
+            return None
+        return data["secrets"], max(0.0, time.time() - data["saved"])
+
+    def fresh(self, age: float) -> bool:
+        return age < self.ttl
+
+    def save(self, values: Dict[str, str]):
+        """
+        Write the cache, readable by the owner only, errors are logged
+        """
+        data = {"identity": self._identity, "saved": time.time(), "secrets": values}
+        try:
+            write_private(self.path, seal(self._token, json.dumps(data).encode("utf-8")))
+        except (OSError, ImportError) as exc:
+            logger.warning(f"vault cache {self.path} not saved: {exc}")
+
+    @contextlib.contextmanager
+    def lock(self, timeout: float):
+        """
+        Hold an exclusive lock on the cache while it is being refreshed, so that
+        processes starting together read vault once rather than each reading it.
+        Waits for at most timeout, then continues without the lock.
+        """
+        try:
+            import fcntl
+        except ImportError:  # not POSIX
+            yield
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError:
+            yield
+            return
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        break
+                    time.sleep(0.05)
+            yield
+        finally:
+            os.close(fd)
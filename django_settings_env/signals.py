@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""
+Signals sent by django_settings_env
+"""
+
+from django.dispatch import Signal
+
+__all__ = ("env_reloaded",)
+
+# sent by DjangoEnv.reload() when variables in .env files have changed, with
+# arguments env (the DjangoEnv) and diff (a watch.EnvDiff)
+env_reloaded = Signal()
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+Compiled settings snapshots
+
+A snapshot records the environment, vault secrets and plugin results resolved
+by a DjangoEnv so that later processes can load them instead of resolving
+everything again. Each snapshot carries a fingerprint of its inputs, and a
+snapshot whose fingerprint does not match the current inputs is ignored.
+"""
+
+import contextlib
+import copy
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, MutableMapping
+
+from .discovery import discover, env_file_name, search_paths
+
+__all__ = (
+    "SNAPSHOT_VERSION",
+    "Snapshot",
+    "SnapshotSecrets",
+    "fingerprint",
+)
+
+SNAPSHOT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def _package_version() -> str:
+    from importlib.metadata import version, PackageNotFoundError
+
+    try:
+        return version("django-settings-env")
+    except PackageNotFoundError:
+        return "0"
+
+
+def _hash(value) -> str:
+    return hashlib.sha256(
+        json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def _file_stamp(path: Path) -> list:
+    st = path.stat()
+    return [path.as_posix(), st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+# set by reading .env files, from the working directory (which is fingerprinted)
+_WORKING_DIRS = ("CWD", "PWD")
+
+
+def fingerprint(
+    environ: MutableMapping[str, str],
+    prefix: str,
+    options: Dict,
+    recorded: Dict[str, str] | None = None,
+) -> str:
+    """
+    Build a fingerprint of everything that determines what a DjangoEnv resolves
+    :param environ: base environment prior to reading any .env files
+    :param prefix: the DjangoEnv prefix
+    :param options: read_env() keyword arguments
+    :param recorded: environment recorded by a snapshot; variables with the value
+        it records are left out, as a process that saved a snapshot with update=True
+        passes them on to its child processes, which could otherwise never use it
+    """
+    recorded = recorded or {}
+    environ = {
+        k: v
+        for k, v in environ.items()
+        if k not in _WORKING_DIRS and (k not in recorded or recorded[k] != v)
+    }
+    files = []
+    if options.get("readenv", True):
+        env_file = env_file_name(options.get("env_file"), environ)
+        paths = search_paths(options.get("search_path"), options.get("overwrite", False))
+        files = [
+            _file_stamp(path)
+            for path in discover(
+                env_file,
+                paths,
+                options.get("parents", False),
+                options.get("decrypt", False),
+            )
+        ]
+    password = options.get("password")
+    return _hash(
+        {
+            "version": SNAPSHOT_VERSION,
+            "package": _package_version(),
+            "cwd": os.getcwd(),
+            "prefix": prefix,
+            "environ": _hash(sorted(environ.items())),
+            "options": {
+                "env_file": options.get("env_file"),
+                "search_path": options.get("search_path"),
+                "parents": options.get("parents"),
+                "overwrite": options.get("overwrite"),
+                "decrypt": options.get("decrypt"),
+                "password": _hash(password) if password else None,
+                "encoding": options.get("encoding"),
+                "working_dirs": options.get("working_dirs"),
+            },
+            "files": files,
+        }
+    )
+
+
+class SnapshotSecrets:
+    """
+    Read-only stand-in for envex's SecretsManager, serving secrets from a snapshot
+    """
+
+    def __init__(self, secrets: Dict[str, str]):
+        self._secrets = secrets
+
+    @property
+    def secrets(self) -> dict:
+        return self._secrets
+
+    def get_secrets(self, _path: str = "") -> dict:
+        return self._secrets
+
+    def get_secret(self, key: str, default: str | None = None, error: bool = False):
+        if key in self._secrets:
+            return self._secrets[key]
+        if error and default is None:
+            raise KeyError(key)
+        return default
+
+    def list_secrets(self, _path: str = ""):
+        yield from self._secrets.keys()
+
+
+class Snapshot:
+    """
+    Versioned record of the values resolved by a DjangoEnv
+    """
+
+    def __init__(
+        self,
+        fingerprint: str,
+        environ: Dict[str, str] | None = None,
+        secrets: Dict[str, str] | None = None,
+        plugins: Dict[str, dict] | None = None,
+    ):
+        self.fingerprint = fingerprint
+        self.environ = environ or {}
+        self.secrets = secrets or {}
+        self.plugins = plugins or {}
+
+    @staticmethod
+    def plugin_key(name: str, url: str, kwargs: Dict) -> str | None:
+        """
+        Key a plugin result by plugin name, url and call arguments.
+        Returns None if the call arguments can't be serialised (e.g. update=globals())
+        """
+        try:
+            return json.dumps([name, url, kwargs], sort_keys=True)
+        except (TypeError, ValueError):
+            return None
+
+    def plugin_result(self, key: str):
+        """
+        Return a copy of a recorded plugin result, or None if not recorded
+        """
+        from .plugin import ConfigDict
+
+        if key in self.plugins:
+            return ConfigDict(copy.deepcopy(self.plugins[key]))
+        return None
+
+    def record_plugin(self, key: str, result: dict):
+        """
+        Record a plugin result if it can be serialised
+        """
+        try:
+            self.plugins[key] = json.loads(json.dumps(result))
+        except (TypeError, ValueError):
+            logger.debug(f"snapshot: plugin result for {key} not recorded")
+
+    def apply(
+        self, environ: MutableMapping[str, str], update: bool = True
+    ) -> MutableMapping[str, str]:
+        """
+        Rebuild the environment that was resolved when the snapshot was saved
+        :param environ: base environment (fingerprint already matched)
+        :param update: whether to update os.environ, as envex.load_env does by default
+        """
+        if update:
+            os.environ.update(self.environ)
+            return os.environ
+        return dict(environ) | self.environ
+
+    def secrets_manager(self) -> SnapshotSecrets:
+        return SnapshotSecrets(self.secrets)
+
+    def as_dict(self) -> dict:
+        return {
+            "version": SNAPSHOT_VERSION,
+            "fingerprint": self.fingerprint,
+            "environ": self.environ,
+            "secrets": self.secrets,
+            "plugins": self.plugins,
+        }
+
+    @classmethod
+    def load(
+        cls, path: str | Path, expected: str | Callable[[Dict], str]
+    ) -> "Snapshot | None":
+        """
+        Load a snapshot, returning None if it is missing, unreadable or stale
+        :param path: snapshot file path
+        :param expected: fingerprint of the current inputs, or a callable returning
+            it given the snapshot's recorded environment (see fingerprint())
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as exc:
+            logger.debug(f"snapshot {path} not loaded: {exc}")
+            return None
+        if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+            logger.debug(f"snapshot {path} ignored: unsupported version")
+            return None
+        if callable(expected):
+            recorded = data.get("environ")
+            expected = expected(recorded if isinstance(recorded, dict) else None)
+        if data.get("fingerprint") != expected:
+            logger.debug(f"snapshot {path} ignored: stale fingerprint")
+            return None
+        return cls(
+            data["fingerprint"],
+            environ=data.get("environ"),
+            secrets=data.get("secrets"),
+            plugins=data.get("plugins"),
+        )
+
+    def save(self, path: str | Path):
+        """
+        Atomically write the snapshot (mkstemp creates it 0600, as it may contain secrets)
+        """
+        path = Path(path)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.as_dict(), f)
+            os.replace(tmp_name, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_name)
+            raise
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Startup trace
+
+An opt-in record of where a DjangoEnv spent its time at startup and which source
+answered for each variable. Enable it with Env(trace=True), or by setting
+DJANGO_SETTINGS_ENV_TRACE to true or to the path of a file to write the trace to.
+Traced instances are of a generated subclass, so untraced instances pay nothing.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from functools import wraps
+from typing import Dict, List
+
+__all__ = (
+    "TRACE_VAR",
+    "StartupTrace",
+    "dump_traces",
+    "trace_enabled",
+    "traced_class",
+    "traces",
+)
+
+TRACE_VAR = "DJANGO_SETTINGS_ENV_TRACE"
+
+logger = logging.getLogger(__name__)
+
+_traces: List["StartupTrace"] = []
+
+
+def _env_setting():
+    value = os.environ.get(TRACE_VAR, "")
+    return None if value.lower() in ("", "0", "false", "no", "off") else value
+
+
+def trace_enabled(trace: bool | None) -> bool:
+    """
+    Whether to trace, given the Env(trace=) argument
+    """
+    return trace if trace is not None else _env_setting() is not None
+
+
+def trace_file() -> str | None:
+    """
+    Path the trace is written to, if DJANGO_SETTINGS_ENV_TRACE names a file
+    """
+    value = _env_setting()
+    if value is None or value.lower() in ("1", "true", "yes", "on"):
+        return None
+    return value
+
+
+def traces() -> List["StartupTrace"]:
+    """
+    Return the traces of all traced Env instances
+    """
+    return list(_traces)
+
+
+def dump_traces(path: str | None = None):
+    """
+    Write all traces as JSON to path (default is the DJANGO_SETTINGS_ENV_TRACE file),
+    or log them if no path is given
+    """
+    path = path or trace_file()
+    data = json.dumps({"traces": [t.as_dict() for t in traces()]}, indent=2)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(data)
+    else:
+        logger.info(data)
+
+
+class StartupTrace:
+    """
+    Phase timings and per-variable provenance of a single Env
+    """
+
+    def __init__(self, prefix: str | None = None):
+        self.prefix = prefix
+        self.phases: List[Dict] = []
+        self.values: Dict[str, Dict] = {}
+        # variable name -> .env file it was read from
+        self.files: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        _traces.append(self)
+
+    @contextlib.contextmanager
+    def phase(self, phase: str, /, **detail):
+        start = time.perf_counter()
+        try:
+            yield detail
+        finally:
+            entry = {"phase": phase, "seconds": time.perf_counter() - start, **detail}
+            with self._lock:
+                self.phases.append(entry)
+
+    def value(self, var, name, source: str, seconds: float, path: str | None = None):
+        with self._lock:
+            entry = self.values.get(name)
+            if entry is None:
+                entry = self.values[name] = {
+                    "var": var,
+                    "prefixed": name != var,
+                    "source": source,
+                    "count": 0,
+                    "seconds": 0.0,
+                }
+                if path:
+                    entry["path"] = path
+            entry["count"] += 1
+            entry["seconds"] += seconds
+
+    def totals(self) -> Dict[str, float]:
+        totals = {}
+        for entry in self.phases:
+            totals[entry["phase"]] = totals.get(entry["phase"], 0.0) + entry["seconds"]
+        for entry in self.values.values():
+            if entry["source"] == "vault":
+                totals["vault"] = totals.get("vault", 0.0) + entry["seconds"]
+        return totals
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "prefix": self.prefix,
+                "totals": self.totals(),
+                "phases": list(self.phases),
+                "values": dict(self.values),
+            }
+
+
+# loader.load_file() is wrapped while any traced Env is reading .env files, so
+# that each file's values and load (including decryption) time can be recorded
+_active = threading.local()
+_hook_lock = threading.Lock()
+_hook_users = 0
+
+
+def _traced_load_file(load_file):
+    @wraps(load_file)
+    def wrapper(env_path, environ, *args, **kwargs):
+        trace = getattr(_active, "trace", None)
+        if trace is None:
+            return load_file(env_path, environ, *args, **kwargs)
+        path = str(env_path)
+        before = dict(environ)
+        encrypted = path.endswith(".enc")
+        with trace.phase("decrypt and load" if encrypted else "load", path=path):
+            load_file(env_path, environ, *args, **kwargs)
+        for key, value in environ.items():
+            if before.get(key) != value:
+                trace.files[key] = path
+
+    wrapper.__traced__ = load_file
+    return wrapper
+
+
+@contextlib.contextmanager
+def _tracing_files(trace: StartupTrace):
+    global _hook_users
+    from . import loader
+
+    with _hook_lock:
+        if _hook_users == 0:
+            loader.load_file = _traced_load_file(loader.load_file)
+        _hook_users += 1
+    _active.trace = trace
+    try:
+        yield
+    finally:
+        _active.trace = None
+        with _hook_lock:
+            _hook_users -= 1
+            if _hook_users == 0:
+                loader.load_file = loader.load_file.__traced__
+
+
+class TracedEnvMixin:
+    """
+    Overrides of DjangoEnv methods that record to self.trace
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.trace = StartupTrace(kwargs.get("prefix"))
+        with self.trace.phase("init"):
+            super().__init__(*args, **kwargs)
+        self.trace.prefix = self.prefix
+
+    def read_env(self, **kwargs):
+        from .discovery import discover, env_file_name, search_paths
+
+        # discovery is cached, so read_env() then reuses the result timed here
+        with self.trace.phase("discovery") as detail:
+            files = discover(
+                env_file_name(kwargs.get("env_file"), kwargs["environ"]),
+                search_paths(kwargs.get("search_path"), kwargs.get("overwrite", False)),
+                kwargs.get("parents", False),
+                kwargs.get("decrypt", False),
+            )
+            detail["files"] = [path.as_posix() for path in files]
+        with self.trace.phase("read_env"), _tracing_files(self.trace):
+            super().read_env(**kwargs)
+        if self.snapshot_loaded:
+            self.trace.files.update(dict.fromkeys(self._snapshot.environ, "snapshot"))
+
+    def get(self, var, default=None, **kwargs):
+        name = self._with_prefix(var, prefix=kwargs.get("prefix", self.prefix))
+        env_value = self.env.get(name)
+        start = time.perf_counter()
+        value = super().get(var, default=default, **kwargs)
+        seconds = time.perf_counter() - start
+        path = None
+        if env_value is not None and value is env_value:
+            path = self.trace.files.get(name)
+            if path is None:
+                source = "os env"
+            elif path == "snapshot":
+                source, path = "snapshot", None
+            else:
+                source = "encrypted file" if path.endswith(".enc") else "file"
+        elif value is not default:
+            source = "vault"
+        else:
+            source = "default"
+        self.trace.value(var, name, source, seconds, path)
+        return value
+
+    def __getattr__(self, name):
+        if name.startswith("_") or name == "trace":
+            return super().__getattr__(name)
+        with self.trace.phase("plugin import", name=name):
+            return super().__getattr__(name)
+
+    def _get_backend(self, name, rplugin, url, kwargs):
+        # parse first, so that parsing is timed separately (the plugin's own
+        # parse is then served from the parser cache)
+        with self.trace.phase("url parse", name=name), contextlib.suppress(ValueError):
+            rplugin.parse_url(url, context=getattr(rplugin, "CONTEXTS", None))
+        with self.trace.phase("plugin", name=name):
+            return super()._get_backend(name, rplugin, url, kwargs)
+
+
+_traced_classes = {}
+
+
+def traced_class(cls: type) -> type:
+    """
+    Return the traced subclass of a DjangoEnv class
+    """
+    if issubclass(cls, TracedEnvMixin):
+        return cls
+    traced = _traced_classes.get(cls)
+    if traced is None:
+        traced = _traced_classes.setdefault(
+            cls, type(f"Traced{cls.__name__}", (TracedEnvMixin, cls), {})
+        )
+    return traced
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+Vault secrets prefetch and background loading
+
+envex's SecretsManager reads secrets when they are first needed, one path per
+round trip. prefetch_secrets() reads a number of paths concurrently within a
+total time budget and merges them into the SecretsManager's secrets cache, so that
+later lookups are served without further requests.
+
+BackgroundSecrets reads them on a background thread instead, retrying until vault
+is available, so that an unavailable vault delays startup by no more than a
+deadline. Its status is reported by health() for readiness probes.
+"""
+
+import importlib.util
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable
+
+__all__ = (
+    "BackgroundSecrets",
+    "VaultHealth",
+    "configured",
+    "health",
+    "prefetch_secrets",
+)
+
+logger = logging.getLogger(__name__)
+
+# delay before retrying an unavailable vault, doubled on each attempt up to RETRY_MAX
+RETRY_INITIAL = 0.5
+RETRY_MAX = 30.0
+
+VaultHealth = namedtuple("VaultHealth", "status attempts error elapsed")
+
+_loaders = weakref.WeakSet()
+
+
+def _read(client, path: str) -> dict:
+    response = client.read(path)
+    if response is not None and "data" in response:
+        return response["data"].get("data") or {}
+    return {}
+
+
+def configured(url: str | None = None, token: str | None = None) -> bool:
+    """
+    Whether a vault address and token are configured, given or as hvac finds them
+    ($VAULT_ADDR, and $VAULT_TOKEN or ~/.vault-token)
+    """
+    if not (url or os.environ.get("VAULT_ADDR")):
+        return False
+    if token:
+        return True
+    try:
+        from hvac.utils import get_token_from_env
+    except ImportError:
+        return False
+    return bool(get_token_from_env())
+
+
+def prefetch_secrets(
+    secret_manager, paths: Iterable[str], budget: float = 5.0, max_workers: int = 8
+) -> Dict[str, float]:
+    """
+    Read vault secret paths concurrently into the secret manager's cache.
+    Paths are relative to the secret manager's base path ("" is the base path itself),
+    and are merged in the order given, so later paths take precedence. As the
+    SecretsManager reads the base path only while it has no secrets, the base path
+    is read first if it is not given and no secrets have been read.
+    Paths not read within the budget are skipped, and are not retried.
+    :param secret_manager: envex SecretsManager
+    :param paths: secret paths to read
+    :param budget: total time allowed in seconds, or None for no limit
+    :param max_workers: maximum number of concurrent requests
+    :return: dict of path to read time in seconds, for each path read
+    """
+    paths = list(dict.fromkeys(paths))
+    start = time.perf_counter()
+    if not paths or (client := secret_manager.client) is None:
+        return {}
+    if "" not in paths and not secret_manager.secrets:
+        paths.insert(0, "")
+    remaining = (
+        None if budget is None else max(0.0, budget - (time.perf_counter() - start))
+    )
+
+    def timed_read(path):
+        started = time.perf_counter()
+        return _read(client, secret_manager.path(path)), time.perf_counter() - started
+
+    pool = ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(paths))), thread_name_prefix="vault"
+    )
+    try:
+        futures = {path: pool.submit(timed_read, path) for path in paths}
+        wait(futures.values(), timeout=remaining)
+    finally:
+        # requests still outstanding are abandoned rather than waited for
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    latency = {}
+    secrets = secret_manager.secrets
+    for path, future in futures.items():
+        if not future.done():
+            logger.warning(f"vault prefetch of '{path}' exceeded the {budget}s budget")
+        elif (exc := future.exception()) is not None:
+            logger.warning(f"vault prefetch of '{path}' failed: {exc}")
+        else:
+            values, latency[path] = future.result()
+            secrets.update(values)
+    return latency
+
+
+class BackgroundSecrets:
+    """
+    Stand-in for envex's SecretsManager that reads secrets on a background thread.
+    Until they have been read, the first lookup of each key waits for at most
+    key_timeout, after which the key's default is returned without waiting.
+    Once read, lookups are served from the secrets read, and other SecretsManager
+    methods are passed to the underlying SecretsManager.
+    """
+
+    LOADING, READY, UNAVAILABLE, DISABLED = "loading", "ready", "unavailable", "disabled"
+
+    def __init__(
+        self,
+        factory: Callable,
+        paths: Iterable[str] = ("",),
+        key_timeout: float = 1.0,
+        fallback: Dict[str, str] | None = None,
+        on_load: Callable | None = None,
+        enabled: bool = True,
+    ):
+        """
+        :param factory: callable returning a SecretsManager (may access vault)
+        :param paths: secret paths to read, as for prefetch_secrets()
+        :param key_timeout: time the first lookup of a key may wait for vault
+        :param fallback: secrets to serve until they have been read (e.g. expired
+            secrets from a SecretsCache), lookups then do not wait
+        :param on_load: called with the secrets once they have been read
+        :param enabled: False if vault is not in use (e.g. not configured), loading
+            then finishes at once with status "disabled"
+        """
+        self.key_timeout = key_timeout
+        self.attempts = 0
+        self.error = None
+        self._factory = factory
+        self._paths = list(paths) or [""]
+        self._status = self.LOADING
+        self._started = time.perf_counter()
+        self._elapsed = None
+        self._manager = None
+        self._secrets = fallback or {}
+        self._on_load = on_load
+        self._enabled = enabled
+        # keys whose first lookup has waited for loading
+        self._waited = set()
+        self._fallback = fallback is not None
+        self._done = threading.Event()
+        self._stop = threading.Event()
+        _loaders.add(self)
+        self._thread = threading.Thread(
+            target=self._load, name="vault-loader", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def status(self) -> str:
+        """
+        One of "loading", "ready", "unavailable" (still retrying) or "disabled"
+        """
+        return self._status
+
+    @property
+    def ready(self) -> bool:
+        """
+        True once loading has finished, whether or not vault is in use
+        """
+        return self._done.is_set()
+
+    def health(self) -> VaultHealth:
+        elapsed = self._elapsed
+        if elapsed is None:
+            elapsed = time.perf_counter() - self._started
+        return VaultHealth(self._status, self.attempts, self.error, elapsed)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Wait for loading to finish
+        :return: True if it has finished
+        """
+        return self._done.wait(timeout)
+
+    def close(self):
+        """
+        Stop retrying, lookups of keys not yet read return their defaults
+        """
+        self._stop.set()
+        _loaders.discard(self)
+        self._finish(self._status)
+
+    def _finish(self, status: str):
+        if not self._done.is_set():
+            self._status = status
+            self._elapsed = time.perf_counter() - self._started
+            self._done.set()
+
+    def _attempt(self):
+        from envex.env_hvac import SecretsManager
+
+        disabled = SecretsManager.hvac_disabled
+        manager = self._factory()
+        if SecretsManager.hvac_disabled and not disabled:
+            # a failed connection disables vault for the process, which is what
+            # retrying is meant to avoid
+            SecretsManager.hvac_disabled = False
+        if manager.client is None:
+            raise ConnectionError("vault client cannot authenticate")
+        latency = prefetch_secrets(manager, self._paths, budget=None)
+        if not latency.keys() >= set(self._paths):
+            raise ConnectionError("vault secrets could not be read")
+        return manager
+
+    def _load(self):
+        from envex.env_hvac import SecretsManager
+
+        if (
+            not self._enabled
+            or importlib.util.find_spec("hvac") is None
+            or SecretsManager.hvac_disabled
+        ):
+            return self._finish(self.DISABLED)
+        delay = RETRY_INITIAL
+        while not self._stop.is_set():
+            self.attempts += 1
+            try:
+                manager = self._attempt()
+            except Exception as exc:
+                self.error = f"{exc.__class__.__name__}: {exc}"
+                if self._status == self.LOADING:
+                    logger.warning(f"vault unavailable, retrying: {self.error}")
+                self._status = self.UNAVAILABLE
+            else:
+                self._manager, self._secrets = manager, manager.secrets
+                self.error = None
+                if self._on_load is not None:
+                    try:
+                        self._on_load(manager.secrets)
+                    except Exception as exc:
+                        logger.warning(f"vault on_load callback failed: {exc}")
+                if self.attempts > 1:
+                    logger.info(f"vault available after {self.attempts} attempts")
+                return self._finish(self.READY)
+            self._stop.wait(delay)
+            delay = min(delay * 2, RETRY_MAX)
+
+    @property
+    def secrets(self) -> dict:
+        return self._secrets
+
+    def get_secrets(self, path: str = "") -> dict:
+        if not path:
+            return self._secrets
+        return self._delegate("get_secrets")(path)
+
+    def get_secret(self, key: str, default: str | None = None, error: bool = False):
+        if key in self._secrets:
+            return self._secrets[key]
+        if not (self._done.is_set() or self._fallback or key in self._waited):
+            self._waited.add(key)
+            self._done.wait(self.key_timeout)
+        if key in self._secrets:
+            return self._secrets[key]
+        if error and default is None:
+            raise KeyError(key)
+        return default
+
+    def share_wait(self, key: str, *keys: str):
+        """
+        Lookups of keys for the same variable as key (e.g. with a prefix added) don't
+        wait for loading if that of key has, so a variable waits at most key_timeout
+        """
+        if key in self._waited:
+            self._waited.update(keys)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._delegate(name)
+
+    def _delegate(self, name):
+        self._done.wait(self.key_timeout)
+        if self._manager is None:
+            raise AttributeError(f"vault is {self._status}, '{name}' is not available")
+        return getattr(self._manager, name)
+
+
+def health() -> dict:
+    """
+    Status of all background vault loaders, for readiness probes.
+    Ready when each has either read its secrets or found vault is not in use.
+    """
+    states = [loader.health() for loader in list(_loaders)]
+    return {
+        "ready": all(
+            s.status in (BackgroundSecrets.READY, BackgroundSecrets.DISABLED)
+            for s in states
+        ),
+        "vault": [s._asdict() for s in states],
+    }
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+Views for health checks, e.g. in urls.py:
+
+    path("ready/vault", vault_health)
+"""
+
+from django.http import JsonResponse
+
+from . import vault
+
+
+def vault_health(request):
+    """
+    Readiness probe: 200 once vault secrets have been read (or vault is not in
+    use), otherwise 503 while they are loading or vault is unavailable
+    """
+    result = vault.health()
+    return JsonResponse(result, status=200 if result["ready"] else 503)
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+Watching .env files for changes
+
+An EnvWatcher watches the .env files a DjangoEnv loaded, and reloads them when
+they change, so that a changed feature flag is seen without restarting workers.
+It uses inotify (through ctypes, Linux only) where available, and otherwise
+polls the files' mtime, inode and size. Events arriving in quick succession, such
+as an editor writing a temporary file then renaming it over the original, are
+coalesced into a single reload.
+
+A reload re-reads the files (only changed files are parsed again, see loader),
+and applies only the variables that differ from those previously loaded.
+Cached values derived from those variables are discarded, and the env_reloaded
+signal is sent with the differences. Variables set by other means since the files
+were loaded are left as they are, as are plugin results for unchanged URLs.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+import weakref
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, List, MutableMapping
+
+from envex.dot_env import ENCRYPTED_EXT
+
+from .discovery import env_file_name, file_stamp
+
+__all__ = (
+    "EnvDiff",
+    "EnvWatcher",
+    "diff_env",
+    "reload",
+)
+
+logger = logging.getLogger(__name__)
+
+EnvDiff = namedtuple("EnvDiff", "added changed removed")
+EnvDiff.__doc__ = """
+Differences between two loads: added and removed are dicts of name to value,
+changed is a dict of name to (old value, new value)
+"""
+
+_reload_lock = threading.Lock()
+
+
+def diff_env(old: MutableMapping[str, str], new: MutableMapping[str, str]) -> EnvDiff:
+    """
+    Compare two environments
+    """
+    return EnvDiff(
+        {k: v for k, v in new.items() if k not in old},
+        {k: (old[k], v) for k, v in new.items() if k in old and old[k] != v},
+        {k: v for k, v in old.items() if k not in new},
+    )
+
+
+def reload(env) -> EnvDiff:
+    """
+    Re-read the .env files of a watched env (see DjangoEnv.reload)
+    """
+    from .loader import load_env
+    from .signals import env_reloaded
+
+    with _reload_lock:
+        options = {**env._read_options, "environ": dict(env._read_base), "update": False}
+        loaded = load_env(**options)
+        diff = diff_env(env._loaded, loaded)
+        environ = env.env
+        for name in (*diff.added, *diff.changed, *diff.removed):
+            # variables set since loading (in the env or os.environ) are kept
+            if environ.get(name) != env._loaded.get(name):
+                continue
+            if name in loaded:
+                environ[name] = loaded[name]
+            else:
+                environ.pop(name, None)
+            env._changed(name)
+        env._loaded = loaded
+    if any(diff):
+        logger.info(
+            f"reloaded .env: {len(diff.added)} added, {len(diff.changed)} changed,"
+            f" {len(diff.removed)} removed"
+        )
+        env_reloaded.send(sender=type(env), env=env, diff=diff)
+    return diff
+
+
+# inotify(7) event masks
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+_IN_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+)
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """
+    Events for files, from inotify watches on their directories (so that files
+    replaced by rename are still watched)
+    """
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        # watch descriptor -> directory, and directory -> names of files in it
+        self._dirs: Dict[int, str] = {}
+        self._names: Dict[str, set] = {}
+
+    def watch(self, directories: Dict[str, set]):
+        for wd, directory in list(self._dirs.items()):
+            if directory not in directories:
+                self._rm_watch(self._fd, wd)
+                del self._dirs[wd]
+        watched = set(self._dirs.values())
+        for directory in directories.keys() - watched:
+            wd = self._add_watch(self._fd, os.fsencode(directory), _IN_MASK)
+            if wd < 0:
+                logger.debug(f"inotify: {directory} not watched: {ctypes.get_errno()}")
+            else:
+                self._dirs[wd] = directory
+        self._names = directories
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Wait for a change to a watched file, ignoring events for other files
+        :return: True if one has changed
+        """
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            if not select.select([self._fd], [], [], remaining)[0]:
+                break
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                continue
+            if self._relevant(data):
+                return True
+        return False
+
+    def _relevant(self, data: bytes) -> bool:
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return True
+            if (directory := self._dirs.get(wd)) is not None and name in self._names.get(
+                directory, ()
+            ):
+                return True
+        return False
+
+    def close(self):
+        os.close(self._fd)
+
+
+class _Polling:
+    """
+    Changes to files from their stamps, including files not (yet) present
+    """
+
+    def __init__(self, stop: threading.Event):
+        self._stop = stop
+        self._paths: List[str] = []
+        self._stamps: List = []
+
+    def _stamp(self):
+        return [file_stamp(path) for path in self._paths]
+
+    def watch(self, directories: Dict[str, set]):
+        self._paths = [
+            os.path.join(directory, name)
+            for directory, names in directories.items()
+            for name in sorted(names)
+        ]
+        self._stamps = self._stamp()
+
+    def wait(self, timeout: float) -> bool:
+        self._stop.wait(timeout)
+        stamps = self._stamp()
+        changed, self._stamps = stamps != self._stamps, stamps
+        return changed
+
+    def close(self):
+        pass
+
+
+class EnvWatcher:
+    """
+    Watch the .env files an env loaded, reloading them on a background thread
+    when they change (see DjangoEnv.reload)
+    """
+
+    def __init__(
+        self,
+        env,
+        interval: float = 1.0,
+        debounce: float = 0.1,
+        polling: bool = False,
+    ):
+        """
+        :param env: DjangoEnv created with watch=
+        :param interval: time between checks when polling
+        :param debounce: time without further changes before reloading, changes
+            are coalesced for at most 10 times this
+        :param polling: poll even if inotify is available
+        """
+        self.interval = interval
+        self.debounce = debounce
+        self.reloads = 0
+        self._env = weakref.ref(env)
+        self._stop = threading.Event()
+        self._backend = None
+        if not polling and sys.platform.startswith("linux"):
+            try:
+                self._backend = _Inotify()
+            except (OSError, AttributeError) as exc:
+                logger.debug(f"inotify not available, polling: {exc}")
+        if self._backend is None:
+            self._backend = _Polling(self._stop)
+        self._watch(env)
+        self._thread = threading.Thread(target=self._run, name="env-watcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def polling(self) -> bool:
+        return isinstance(self._backend, _Polling)
+
+    @property
+    def files(self) -> List[Path]:
+        return list(self._files)
+
+    def _watch(self, env):
+        from .loader import env_files
+
+        options = env._read_options
+        self._files = list(dict.fromkeys(env_files(**options, environ=env._read_base)))
+        env_file = env_file_name(options.get("env_file"), env._read_base)
+        directories = {}
+        for path in self._files:
+            # also notice the encrypted or plain variant being added or removed
+            directories.setdefault(str(path.parent), set()).update(
+                (path.name, env_file, env_file + ENCRYPTED_EXT)
+            )
+        self._backend.watch(directories)
+
+    def _changed(self) -> bool:
+        # a changed file is reloaded once no more changes follow within debounce
+        if not self._backend.wait(self.interval):
+            return False
+        deadline = time.monotonic() + self.debounce * 10
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            if not self._backend.wait(self.debounce):
+                break
+        return True
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                if not self._changed() or self._stop.is_set():
+                    continue
+                if (env := self._env()) is None:
+                    break
+                try:
+                    reload(env)
+                    self.reloads += 1
+                    self._watch(env)
+                except Exception as exc:
+                    logger.warning(f"reloading .env failed: {exc}")
+                del env
+        finally:
+            self._backend.close()
+
+    def close(self, timeout: float | None = None):
+        """
+        Stop watching
+        """
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout if timeout is not None else self.interval + 1)
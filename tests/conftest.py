@@ -0,0 +1,10 @@
+import pytest
+
+from django_settings_env import plugin
+
+
+@pytest.fixture(autouse=True)
+def plugin_cache(monkeypatch):
+    # the plugin entry point index is not cached unless configured, as by default,
+    # whatever the environment running the tests; cache tests set the variable
+    monkeypatch.delenv(plugin.PLUGIN_CACHE_VAR, raising=False)
@@ -0,0 +1,77 @@
+"""
+Minimal vault HTTP API (token lookup and kv v2 reads) for testing
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOKEN = "test-token"
+
+
+class FakeVault:
+    def __init__(self, secrets=None, delays=None):
+        # path below secret/data/ -> dict of values, and -> delay in seconds
+        self.secrets = secrets or {}
+        self.delays = delays or {}
+        self.requests = []
+        # when False, every request fails as if vault were sealed or restarting
+        self.available = True
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._server.block_on_close = False
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        vault = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                with vault._lock:
+                    vault.requests.append(self.path)
+                if not vault.available:
+                    return self._send(503, {"errors": ["Vault is sealed"]})
+                if self.headers.get("X-Vault-Token") != TOKEN:
+                    return self._send(403, {"errors": ["permission denied"]})
+                if self.path == "/v1/auth/token/lookup-self":
+                    return self._send(200, {"data": {"id": TOKEN}})
+                prefix = "/v1/secret/data/"
+                path = self.path[len(prefix) :] if self.path.startswith(prefix) else None
+                if path is None or path not in vault.secrets:
+                    return self._send(404, {"errors": []})
+                time.sleep(vault.delays.get(path, 0))
+                self._send(200, {"data": {"data": vault.secrets[path]}})
+
+        return Handler
+
+    def reads(self):
+        with self._lock:
+            return [p for p in self.requests if p.startswith("/v1/secret/")]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -1,4 +1,6 @@
-from django_settings_env.parser.__init__ import ParsedUrl
+import pytest
+
+from django_settings_env.parser import ParsedUrl, QueryOptions, URLParser
 
 
 def test_parsed_url_basic_attributes():
@@ -54,3 +56,48 @@ def test_parsed_url_with_only_required_fields():
 def test_parsed_url_with_port_and_without_username_password():
     parsed = ParsedUrl(scheme="https", hostname="example.com", port=8443)
     assert parsed.to_url() == "https://example.com:8443"
+
+
+def test_parsed_url_is_hashable_and_slotted():
+    first = ParsedUrl(scheme="redis", hostname="localhost", qs={"db": "0"})
+    second = ParsedUrl(scheme="redis", hostname="localhost", qs={"db": "0"})
+    first.to_url()
+    assert first == second and hash(first) == hash(second)
+    assert len({first, second}) == 1
+    assert not hasattr(first, "__dict__")
+
+
+def test_parsed_url_to_url_is_memoised():
+    parsed = ParsedUrl(scheme="redis", hostname="localhost", port=6379, path="/0")
+    assert parsed.to_url() is parsed.to_url()
+    assert parsed.to_url(scheme=None) == "localhost:6379/0"
+    assert parsed.to_url() == "redis://localhost:6379/0"
+
+
+def test_query_options():
+    qs = QueryOptions([("a", "1"), ("b", "2"), ("a", "3")])
+    assert qs == {"a": "1", "b": "2"}
+    assert list(qs) == ["a", "b"] and len(qs) == 2 and qs["a"] == "1"
+    assert qs.pairs() == (("a", "1"), ("b", "2"), ("a", "3"))
+    # repeated values are kept, so distinguish otherwise equal options
+    assert qs != QueryOptions({"a": "1", "b": "2"})
+    assert qs == QueryOptions([("b", "2"), ("a", "1"), ("a", "3")])
+    qs = QueryOptions({"a": "1", "b": "2"})
+    reordered = QueryOptions({"b": "2", "a": "1"})
+    assert qs == reordered and hash(qs) == hash(reordered)
+    assert len({ParsedUrl(scheme="x", qs=qs), ParsedUrl(scheme="x", qs=reordered)}) == 1
+    with pytest.raises(KeyError):
+        qs["c"]
+    with pytest.raises(TypeError):
+        qs["a"] = "2"
+    options = {"timeout": 5}
+    options |= qs
+    assert options == {"timeout": 5, "a": "1", "b": "2"}
+
+
+@pytest.mark.parametrize("url", ["x://h/p?a=1&b=2&a=3", "x://h/p%20q?a=1&b=2&a=3"])
+def test_repeated_query_options_round_trip(url):
+    # the second URL is not simple, so is parsed by yarl
+    parsed = URLParser(cache_size=0).parse(url)
+    assert parsed.qs["a"] == "1"
+    assert parsed.to_url(qs=True).endswith("?a=1&b=2&a=3")
@@ -0,0 +1,93 @@
+import json
+import sys
+
+import pytest
+
+from django_settings_env import Env, plugin
+
+PLUGIN_MODULE = """
+from django_settings_env.plugin import EnvPlugin
+
+
+class WidgetPlugin(EnvPlugin):
+    VAR = "WIDGET_URL"
+
+    def get_backend(self, url, **kwargs):
+        return {"URL": url}
+"""
+
+
+def add_distribution(path, name, entry_points):
+    dist_info = path / f"{name}-1.0.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text(
+        f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n"
+    )
+    lines = [f"{key} = {value}" for key, value in entry_points.items()]
+    (dist_info / "entry_points.txt").write_text(
+        "\n".join([f"[{plugin.PLUGIN_ENTRY_POINT_GROUP}]", *lines, ""])
+    )
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    site = tmp_path / "site"
+    site.mkdir()
+    (site / "widget_plugin.py").write_text(PLUGIN_MODULE)
+    add_distribution(site, "widget", {"widget_url": "widget_plugin:WidgetPlugin"})
+    monkeypatch.syspath_prepend(str(site))
+    monkeypatch.setenv(plugin.PLUGIN_CACHE_VAR, str(tmp_path / "index.json"))
+    monkeypatch.setattr(plugin, "_entry_point_index", None)
+    monkeypatch.setattr(plugin, "_registered_plugins", dict(plugin._registered_plugins))
+    monkeypatch.delitem(sys.modules, "widget_plugin", False)
+    return site
+
+
+def test_entry_point_plugin(site):
+    env = Env(environ={"WIDGET_URL": "widget://host"}, readenv=False)
+    assert env.widget_url() == {"URL": "widget://host"}
+    assert plugin.entry_point_index()["widget_url"] == "widget_plugin:WidgetPlugin"
+
+
+def test_entry_point_index_cached(site, tmp_path, monkeypatch):
+    plugin.entry_point_index()
+    data = json.loads((tmp_path / "index.json").read_text())
+    assert data["plugins"] == {"widget_url": "widget_plugin:WidgetPlugin"}
+
+    def fail():
+        raise AssertionError("entry points enumerated despite cached index")
+
+    # a new process reuses the cached index while the distributions are unchanged
+    monkeypatch.setattr(plugin, "_entry_point_index", None)
+    monkeypatch.setattr(plugin, "_read_entry_points", fail)
+    assert plugin.get_plugin_from_name("widget_url") is not None
+
+
+def test_entry_point_index_stale(site, monkeypatch):
+    plugin.entry_point_index()
+    add_distribution(site, "gadget", {"gadget_url": "widget_plugin:WidgetPlugin"})
+    monkeypatch.setattr(plugin, "_entry_point_index", None)
+    assert "gadget_url" in plugin.entry_point_index()
+
+
+def test_entry_point_index_not_read_for_builtin_or_private_names(site, monkeypatch):
+    def fail():
+        raise AssertionError("entry point index built unnecessarily")
+
+    monkeypatch.setattr(plugin, "entry_point_index", fail)
+    assert plugin.get_plugin_from_name("cache_url") is not None
+    assert plugin.get_plugin_from_name("__deepcopy__") is None
+
+
+@pytest.mark.parametrize("configured", [False, True])
+def test_entry_point_index_not_cached_by_default(site, tmp_path, monkeypatch, configured):
+    if configured:
+        monkeypatch.setenv(plugin.PLUGIN_CACHE_VAR, "")
+    else:
+        monkeypatch.delenv(plugin.PLUGIN_CACHE_VAR)
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    env = Env(environ={"WIDGET_URL": "widget://host"}, readenv=False)
+    assert env.widget_url() == {"URL": "widget://host"}
+    assert "widget_url" in plugin.entry_point_index()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["site"]
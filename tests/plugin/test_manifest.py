@@ -0,0 +1,101 @@
+import gc
+import importlib
+import json
+import subprocess
+import sys
+import threading
+import weakref
+
+import pytest
+
+from django_settings_env import Env, plugin
+
+# generous, the budget is to catch plugins being imported eagerly again
+IMPORT_BUDGET_SECONDS = 2.0
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from django_settings_env import Env
+env = Env(environ={}, readenv=False)
+elapsed = time.perf_counter() - start
+loaded = sorted(m for m in sys.modules if m.startswith("django_settings_env.plugin."))
+env.cache_url("CACHE_URL", default="locmem://")
+after = sorted(m for m in sys.modules if m.startswith("django_settings_env.plugin."))
+print(json.dumps({"elapsed": elapsed, "loaded": loaded, "after": after}))
+"""
+
+
+def test_plugins_imported_on_first_use():
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT], capture_output=True, check=True, text=True
+    ).stdout
+    result = json.loads(output)
+    assert result["loaded"] == []
+    assert result["after"] == ["django_settings_env.plugin.plugin_cache"]
+    assert result["elapsed"] < IMPORT_BUDGET_SECONDS
+
+
+def test_manifest_modules_register_their_names():
+    for name, module in plugin.PLUGIN_MANIFEST.items():
+        importlib.import_module(f"{plugin.__name__}.{module}")
+        assert plugin.get_plugin_from_name(name) is not None, name
+
+
+def test_unknown_plugin():
+    assert plugin.get_plugin_from_name("no_such_url") is None
+
+
+def test_concurrent_first_use(monkeypatch):
+    monkeypatch.setattr(plugin, "_registered_plugins", {})
+    monkeypatch.delitem(sys.modules, "django_settings_env.plugin.plugin_email", False)
+    results = []
+    barrier = threading.Barrier(8)
+
+    def lookup():
+        barrier.wait()
+        results.append(plugin.get_plugin_from_name("email_url"))
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 8 and results[0] is not None
+    assert all(result is results[0] for result in results)
+
+
+def test_registry_is_replaced_on_registration(monkeypatch):
+    registry = plugin._registered_plugins
+    monkeypatch.setattr(plugin, "_registered_plugins", registry)
+    plugin._register_plugin(type(plugin.get_plugin_from_name("cache_url")), "other_url")
+    assert "other_url" not in registry
+    assert "other_url" in plugin._registered_plugins
+    with pytest.raises(TypeError):
+        registry["other_url"] = None
+
+
+def test_plugin_methods_are_defined_on_the_class():
+    env = Env(environ={"CACHE_URL": "locmem://"}, readenv=False)
+    assert env.cache_url()["BACKEND"].endswith("LocMemCache")
+    assert "cache_url" not in vars(env)
+    assert "cache_url" in vars(type(env))
+    assert type(env).cache_url.__name__ == "cache_url"
+
+
+def test_plugin_method_does_not_retain_env():
+    gc.disable()
+    try:
+        env = Env(environ={"CACHE_URL": "locmem://"}, readenv=False)
+        ref = weakref.ref(env)
+        env.cache_url()
+        del env
+        # freed by reference counting alone, i.e. no reference cycle via a handler
+        assert ref() is None
+    finally:
+        gc.enable()
+
+
+def test_plugin_method_drops_none_options():
+    env = Env(environ={"DATABASE_URL": "sqlite:///db.sqlite3"}, readenv=False)
+    assert env.database_url(conn_max_age=None) == env.database_url()
@@ -0,0 +1,51 @@
+import json
+
+from benchmarks import __main__ as bench_main
+from benchmarks import suite
+from django_settings_env import deferred
+
+
+def test_suite_covers_hot_paths(tmp_path):
+    names = suite.cases(tmp_path)
+    assert {"Env() .env parent search", "get prefix fallback", "settings.X plain"} <= set(
+        names
+    )
+    assert all(f"{name} get_backend" in names for name in suite.PLUGIN_URLS)
+
+
+def test_suite_deferred_settings_cases(tmp_path):
+    names = suite.cases(tmp_path)
+    try:
+        assert names["settings.X plain"]()() is True
+        assert not getattr(deferred.deferred_handler, "__enabled__", False)
+        for name, expected in (("wrapper", True), ("value", "x")):
+            operation = names[f"settings.X deferred {name}"]()
+            assert deferred.deferred_handler.__enabled__
+            assert operation() == expected
+    finally:
+        deferred.restore_handler()
+
+
+def test_suite_run_selected():
+    results = suite.run(number=10, selected=["get", "URLParser"])
+    assert "get prefix fallback" in results and "URLParser() cached" in results
+    assert "int" not in results
+    assert all(ns > 0 for ns in results.values())
+
+
+def test_regressions():
+    baseline = {"a": 100.0, "b": 100.0, "c": 100.0}
+    results = {"a": 110.0, "b": 150.0, "d": 1000.0}
+    assert suite.regressions(results, baseline, 0.25) == {"b": 1.5}
+
+
+def test_main_json_and_baseline(tmp_path, capsys):
+    output = tmp_path / "results.json"
+    assert bench_main.main(["--number", "10", "--json", str(output), "bool"]) == 0
+    data = json.loads(output.read_text())
+    assert data["version"] == suite.RESULTS_VERSION and "bool" in data["results"]
+
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(suite.as_json({"bool": 1e-6})))
+    assert bench_main.main(["--number", "10", "--baseline", str(baseline), "bool"]) == 1
+    assert "REGRESSION bool" in capsys.readouterr().err
@@ -0,0 +1,126 @@
+import io
+import json
+
+import pytest
+from django.conf import LazySettings
+from django.core.management import call_command
+
+import django_settings_env
+from django_settings_env import Env, apps, counters, deferred
+from django_settings_env.deferred import DeferredSetting
+from django_settings_env.management.commands import settings_access
+
+
+@pytest.fixture(autouse=True)
+def stop_counting():
+    yield
+    counters.disable()
+
+
+@pytest.fixture
+def env():
+    return Env(environ={"USED": "used", "UNUSED": "unused"}, readenv=False, prefix="")
+
+
+def configured(env, **options):
+    settings = LazySettings()
+    settings.configure(
+        DEBUG=True,
+        USED=DeferredSetting(env, scope=None, kwargs={"name": "USED"}),
+        UNUSED=DeferredSetting(env, scope=None, kwargs={"name": "UNUSED"}),
+        **options,
+    )
+    return settings
+
+
+def test_counters_disabled_by_default():
+    assert counters.counters() is None
+    assert counters.disable() is None
+
+
+def test_counts_reads_and_resolutions(env):
+    active = counters.enable()
+    settings = configured(env)
+    for _ in range(5):
+        assert settings.DEBUG is True
+        assert settings.USED == "used"
+
+    assert active.reads == {"DEBUG": 5, "USED": 5}
+    assert active.resolutions["USED"]["count"] == 1
+    assert active.resolutions["USED"]["seconds"] >= 0
+    assert "UNUSED" in active.unused() and "USED" not in active.unused()
+    assert counters.disable() is active
+    assert settings.DEBUG is True
+    assert active.reads["DEBUG"] == 5
+
+
+def test_counts_are_sampled(env):
+    active = counters.enable(sample=10)
+    settings = configured(env)
+    for _ in range(100):
+        settings.DEBUG
+    assert active.reads == {"DEBUG": 100}
+
+
+def test_disable_restores_deferred_wrapper(env):
+    active = counters.enable()
+    counters.disable()
+    settings = configured(env)
+    assert settings.USED == "used"
+    assert active.reads == {} and active.resolutions == {}
+    deferred.restore_handler()
+    assert "__getattribute__" not in vars(LazySettings)
+
+
+def test_disable_restores_plain_access():
+    deferred.restore_handler()
+    counters.enable()
+    counters.disable()
+    assert not deferred.deferred_handler.__enabled__
+    assert "__getattribute__" not in vars(LazySettings)
+
+
+def test_counting_survives_restore_handler(env):
+    active = counters.enable()
+    settings = configured(env)
+    # e.g. deferred.resolve_in_place(), which no longer needs the deferred wrapper
+    deferred.restore_handler()
+    settings.DEBUG
+    assert active.reads == {"DEBUG": 1}
+    counters.disable()
+    assert "__getattribute__" not in vars(LazySettings)
+
+
+def test_save_and_command(env, tmp_path):
+    active = counters.enable()
+    settings = configured(env)
+    settings.USED
+    settings.DEBUG
+    active.save(str(tmp_path / "access-{pid}.json"))
+    files = list(tmp_path.glob("access-*.json"))
+    assert len(files) == 1 and json.loads(files[0].read_text())["reads"]["USED"] == 1
+
+    out = io.StringIO()
+    call_command(settings_access.Command(), str(files[0]), stdout=out)
+    report = out.getvalue()
+    assert "USED" in report
+    unused = report.split("Deferred settings never read:")[1].split()
+    assert "UNUSED" in unused and "USED" not in unused
+
+
+def test_command_reports_current_process(env, monkeypatch):
+    monkeypatch.setattr(settings_access, "settings", LazySettings())
+    settings_access.settings.configure()
+    counters.enable()
+    configured(env).DEBUG
+    out = io.StringIO()
+    call_command(settings_access.Command(), stdout=out)
+    assert "DEBUG" in out.getvalue()
+
+
+def test_app_ready_enables_counters(env, monkeypatch):
+    settings = LazySettings()
+    settings.configure(SETTINGS_ENV_ACCESS_COUNTERS=4)
+    monkeypatch.setattr(apps, "settings", settings)
+    apps.DjangoSettingsEnvConfig("django_settings_env", django_settings_env).ready()
+    assert counters.counters().sample == 4
@@ -1,6 +1,15 @@
 import pytest
 from unittest.mock import MagicMock
-from django_settings_env.deferred import DeferredSetting
+from django.conf import LazySettings
+
+from django_settings_env.deferred import (
+    DeferredSetting,
+    invalidate,
+    resolve_all,
+    resolve_in_place,
+    restore_handler,
+    settings_cache,
+)
 
 
 @pytest.fixture
@@ -76,3 +85,213 @@ def test_repr(mock_env, mock_scope, name, env_value, expected_repr):
 
     # Assert
     assert result == expected_repr
+
+
+def test_resolve_in_place(mock_env):
+    # Arrange
+    mock_env.get.return_value = "resolved"
+    settings = LazySettings()
+    settings.configure(
+        DEBUG=True,
+        IN_PLACE_VAR=DeferredSetting(
+            mock_env, scope=None, kwargs={"name": "IN_PLACE_VAR"}
+        ),
+    )
+    assert "__getattribute__" in vars(LazySettings)
+    assert settings.IN_PLACE_VAR == "resolved"
+
+    # Act
+    resolved = resolve_in_place(settings)
+
+    # Assert
+    assert resolved == ["IN_PLACE_VAR"]
+    assert "__getattribute__" not in vars(LazySettings)
+    assert settings.IN_PLACE_VAR == "resolved"
+    assert settings.DEBUG is True
+    assert mock_env.get.call_count == 1
+
+
+def test_restore_handler_is_reversible(mock_env):
+    original = LazySettings.__getattr__
+    DeferredSetting(mock_env, scope=None, kwargs={"name": "ANY"})
+    assert LazySettings.__getattr__ is not original
+    restore_handler()
+    assert LazySettings.__getattr__ is original
+    assert "__getattribute__" not in vars(LazySettings)
+
+
+@pytest.fixture
+def real_env():
+    from django_settings_env import Env
+
+    return Env(environ={"SCOPED_VAR": "first"}, readenv=False)
+
+
+def configured(**options):
+    settings = LazySettings()
+    settings.configure(**options)
+    return settings
+
+
+def test_cache_is_scoped_to_settings(mock_env):
+    mock_env.get.side_effect = ["one", "two"]
+    first = configured(SCOPED=DeferredSetting(mock_env, scope=None, kwargs={}))
+    second = configured(SCOPED=DeferredSetting(mock_env, scope=None, kwargs={}))
+    assert first.SCOPED == "one"
+    assert second.SCOPED == "two"
+    assert first.SCOPED == "one"
+    assert mock_env.get.call_count == 2
+
+
+def test_cache_follows_env_generation(real_env):
+    settings = configured(SCOPED_VAR=DeferredSetting(real_env, scope=None, kwargs={}))
+    assert settings.SCOPED_VAR == "first"
+    real_env["SCOPED_VAR"] = "second"
+    assert settings.SCOPED_VAR == "second"
+    del real_env["SCOPED_VAR"]
+    assert settings.SCOPED_VAR is None
+
+
+def test_cache_survives_override(mock_env):
+    from django.conf import UserSettingsHolder
+
+    mock_env.get.return_value = "cached"
+    settings = configured(SCOPED=DeferredSetting(mock_env, scope=None, kwargs={}))
+    assert settings.SCOPED == "cached"
+    # swap the wrapped settings object as override_settings does
+    original = settings._wrapped
+    override = UserSettingsHolder(original)
+    override.SCOPED = DeferredSetting(mock_env, scope=None, kwargs={})
+    settings._wrapped = override
+    mock_env.get.return_value = "overridden"
+    assert settings.SCOPED == "overridden"
+    settings._wrapped = original
+    assert settings.SCOPED == "cached"
+    assert mock_env.get.call_count == 2
+
+
+def test_invalidate(mock_env):
+    mock_env.get.side_effect = ["one", "two", "three"]
+    settings = configured(SCOPED=DeferredSetting(mock_env, scope=None, kwargs={}))
+    assert settings.SCOPED == "one"
+    assert settings_cache(settings).get("SCOPED", settings._wrapped.SCOPED) == "one"
+    invalidate("SCOPED", settings=settings)
+    assert settings.SCOPED == "two"
+    invalidate()
+    assert settings.SCOPED == "three"
+
+
+def test_resolve_all_concurrently():
+    import threading
+    import time
+
+    barrier = threading.Barrier(4, timeout=5)
+
+    class SlowEnv:
+        generation = 0
+        calls = 0
+
+        def get(self, name, **_kwargs):
+            SlowEnv.calls += 1
+            barrier.wait()  # only passes if all lookups run concurrently
+            time.sleep(0.01)
+            return name.lower()
+
+    env = SlowEnv()
+    values = [
+        DeferredSetting(env, scope=None, kwargs={"name": f"SLOW_{i}"}) for i in range(4)
+    ]
+
+    latency = resolve_all(values, max_workers=4)
+
+    assert set(latency) == {f"SLOW_{i}" for i in range(4)}
+    assert all(elapsed >= 0.01 for elapsed in latency.values())
+    assert [v.setting(None) for v in values] == [f"slow_{i}" for i in range(4)]
+    assert SlowEnv.calls == 4
+    # already resolved
+    assert resolve_all(values) == {}
+
+
+def test_env_resolve_deferred():
+    from django_settings_env import Env
+
+    env = Env(environ={"PREFETCH_ONE": "1", "DJANGO_PREFETCH_TWO": "2"}, readenv=False)
+    other = Env(environ={}, readenv=False)
+    PREFETCH_ONE = env()
+    PREFETCH_TWO = env()
+    OTHER_VAR = other()
+
+    latency = env.resolve_deferred()
+
+    assert set(latency) == {"PREFETCH_ONE", "PREFETCH_TWO"}
+    assert PREFETCH_ONE.resolved and PREFETCH_TWO.resolved
+    assert not OTHER_VAR.resolved
+    assert repr(PREFETCH_TWO) == "2"
+    env["PREFETCH_ONE"] = "changed"
+    assert not PREFETCH_ONE.resolved
+    assert repr(PREFETCH_ONE) == "changed"
+
+
+def test_app_ready_resolves_deferred(mock_env, monkeypatch):
+    import django_settings_env
+    from django_settings_env import apps
+
+    mock_env.get.return_value = "value"
+    value = DeferredSetting(mock_env, scope=None, kwargs={"name": "APP_READY"})
+    monkeypatch.setattr(apps, "settings", configured(SETTINGS_ENV_RESOLVE_DEFERRED=2))
+
+    apps.DjangoSettingsEnvConfig("django_settings_env", django_settings_env).ready()
+
+    assert value.resolved
+
+
+def test_synthetic_settings_module():
+    import gc
+    import sys
+    import time
+    import types
+
+    from django_settings_env import Env, deferred
+
+    count = 1000
+    env = Env(environ={f"SYN_{i}": str(i) for i in range(count)}, readenv=False)
+    module = types.ModuleType("synthetic_settings")
+    module.env = env
+    source = "\n".join(f"SYN_{i} = env()" for i in range(count))
+    exec(compile(source, "synthetic_settings.py", "exec"), module.__dict__)
+    values = [getattr(module, f"SYN_{i}") for i in range(count)]
+
+    # no frame is retained for module level declarations
+    assert not any(
+        isinstance(r, types.FrameType) for r in gc.get_referrers(module.__dict__)
+    )
+    assert not hasattr(values[0], "__dict__")
+    assert sys.getsizeof(values[0]) < 100
+
+    start = time.perf_counter()
+    resolved = [repr(value) for value in values]
+    elapsed = time.perf_counter() - start
+
+    assert resolved == [str(i) for i in range(count)]
+    # the module namespace was indexed once for all settings, then released
+    assert all(value._scope is None for value in values)
+    assert id(module.__dict__) not in deferred._scopes
+    assert elapsed < 1.0
+
+
+def test_function_scope_releases_frame():
+    import sys
+
+    from django_settings_env import Env, deferred
+
+    env = Env(environ={"FUNC_SCOPED": "value"}, readenv=False)
+
+    def declare():
+        FUNC_SCOPED = env()
+        return FUNC_SCOPED, sys._getframe()
+
+    value, frame = declare()
+    assert value._scope is not None and value._scope.source is frame
+    assert value.name == "FUNC_SCOPED"
+    assert value._scope is None
+    assert id(frame) not in deferred._scopes
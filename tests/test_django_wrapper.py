@@ -1,5 +1,6 @@
 import contextlib
 import io
+import os
 
 import envex
 import pytest
@@ -305,3 +306,92 @@ def test_is_any_set():
     # Test with complex nested structure
     assert env.is_any_set("TEST_VAR4", ["TEST_VAR5", ("TEST_VAR1",)])
     assert not env.is_any_set("TEST_VAR4", ["TEST_VAR5", ("TEST_VAR6",)])
+
+
+class CountingEnviron(dict):
+    lookups = 0
+
+    def get(self, key, default=None):
+        self.lookups += 1
+        return super().get(key, default)
+
+
+def test_prefix_resolution_is_memoized():
+    environ = CountingEnviron(DJANGO_MEMO_VAR="prefixed")
+    env = Env(environ=environ, readenv=False)
+    assert env.get("MEMO_VAR") == "prefixed"
+    environ.lookups = 0
+    assert env.get("MEMO_VAR") == "prefixed"
+    assert env.int("MEMO_VAR") == 0
+    assert environ.lookups == 2
+
+    # setting or unsetting the raw var changes the resolved name
+    env["MEMO_VAR"] = "raw"
+    assert env.get("MEMO_VAR") == "raw"
+    env.unset("MEMO_VAR")
+    assert env.get("MEMO_VAR") == "prefixed"
+    assert env.get("MEMO_VAR", prefix="OTHER_") is None
+
+    # as are changes made directly to the environment
+    environ["MEMO_VAR"] = "direct"
+    assert env.get("MEMO_VAR") == "direct"
+    del environ["MEMO_VAR"]
+    assert env.get("MEMO_VAR") == "prefixed"
+
+
+def test_prefix_resolution_follows_os_environ(monkeypatch):
+    monkeypatch.setenv("DJANGO_MEMO_FOO", "prefixed")
+    monkeypatch.delenv("MEMO_FOO", raising=False)
+    env = Env(readenv=False)
+    assert env.get("MEMO_FOO") == "prefixed"
+    os.environ["MEMO_FOO"] = "raw"
+    assert env.get("MEMO_FOO") == "raw"
+    del os.environ["MEMO_FOO"]
+    assert env.get("MEMO_FOO") == "prefixed"
+
+
+def test_typed_values_are_cached():
+    environ = CountingEnviron(ALLOWED_HOSTS="a.example.com, 'b.example.com'", PORT="80")
+    env = Env(environ=environ, readenv=False)
+    hosts = env.list("ALLOWED_HOSTS")
+    assert hosts == ["a.example.com", "b.example.com"]
+    assert env.int("PORT") == 80
+    environ.lookups = 0
+
+    # returned lists are copies
+    hosts.append("c.example.com")
+    assert env.list("ALLOWED_HOSTS") == ["a.example.com", "b.example.com"]
+    assert env("PORT", type=int) == 80
+    # the raw value is read, but not converted again
+    assert environ.lookups == 2
+    assert env.typed_cache_info() == (2, 2, 2)
+
+    # a different default is a different entry
+    assert env.int("MISSING_PORT", default=8000) == 8000
+    assert env.int("MISSING_PORT", default=9000) == 9000
+    assert env.typed_cache_info().misses == 4
+
+    env["PORT"] = "8080"
+    assert env.int("PORT") == 8080
+    env.unset("ALLOWED_HOSTS")
+    assert env.list("ALLOWED_HOSTS") == []
+
+
+def test_typed_values_follow_os_environ(monkeypatch):
+    monkeypatch.setenv("DJANGO_DEBUG", "true")
+    monkeypatch.setenv("PORT", "8000")
+    env = Env(readenv=False)
+    assert env.bool("DEBUG") is True
+    assert env.int("PORT") == 8000
+    # changed directly, not through the env
+    os.environ["DJANGO_DEBUG"] = "false"
+    os.environ["PORT"] = "9000"
+    assert env.bool("DEBUG") is False
+    assert env.int("PORT") == 9000
+
+
+def test_typed_values_unhashable_default():
+    env = Env(environ={}, readenv=False)
+    default = ["x"]
+    assert env.list("NO_SUCH_LIST", default=default) is default
+    assert env.typed_cache_info() == (0, 0, 0)
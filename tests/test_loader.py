@@ -0,0 +1,265 @@
+import inspect
+import os
+import time
+
+import pytest
+from envex import dot_env
+
+from django_settings_env import Env, discovery, loader
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    """
+    root/.env, root/a/.env.local, root/a/b/c (no env file), cwd is root/work
+    """
+    root = tmp_path / "root"
+    nested = root / "a" / "b" / "c"
+    nested.mkdir(parents=True)
+    (root / "work").mkdir()
+    (root / ".env").write_text(
+        "# comment\nDJANGO_DEBUG=true\nBASE=/srv\nDATA=${BASE}/data\n"
+        "QUOTED='a value'\nexport EXPORTED_VAR=1\n"
+    )
+    (root / "a" / ".env.local").write_text("DJANGO_DEBUG=false\nLOCAL=1\n")
+    monkeypatch.chdir(root / "work")
+    monkeypatch.delenv("EXPORTED_VAR", raising=False)
+    discovery.clear_discovery_cache()
+    loader.clear_file_cache()
+    loader.clear_decrypt_cache()
+    return root
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"search_path": "a/b/c", "parents": True},
+        {"search_path": "a/b/c", "parents": False},
+        {"search_path": ["a/b/c", "."], "parents": True},
+        {"search_path": ["a/b/c", "."], "parents": True, "overwrite": True},
+        {"search_path": "a/b/c", "parents": True, "env_file": ".env.local"},
+        {"search_path": "a/b/c", "parents": True, "working_dirs": False},
+        {"search_path": "a", "parents": True, "decrypt": True},
+    ],
+)
+def test_same_as_envex(tree, options):
+    options = dict(options)
+    search_path = options.pop("search_path")
+    if isinstance(search_path, str):
+        search_path = str(tree / search_path)
+    else:
+        search_path = [str(tree / p) for p in search_path]
+    expected = dot_env.load_env(
+        search_path=search_path, environ={"KEPT": "x"}, update=False, **options
+    )
+    for _ in range(2):  # uncached, then cached
+        result = loader.load_env(
+            search_path=search_path, environ={"KEPT": "x"}, update=False, **options
+        )
+        assert result == expected
+
+
+def test_envex_internals():
+    # the shared caches depend on these private envex functions, so a release that
+    # removes or changes them should fail here (and raise the pinned upper bound)
+    assert loader._envex_internals
+    arity = {
+        name: len(inspect.signature(getattr(dot_env, name)).parameters)
+        for name in loader._ENVEX_INTERNALS
+    }
+    assert arity == {"_process_line": 4, "_post_process": 1, "_update_os_env": 1}
+    func, key, value = dot_env._process_line(1, "export A='1'", False, None)
+    assert (key, value) == ("A", "1") and callable(func)
+
+
+def test_without_envex_internals(tree, monkeypatch):
+    monkeypatch.setattr(loader, "_envex_internals", False)
+    search_path = str(tree / "a")
+    expected = dot_env.load_env(
+        search_path=search_path, environ={}, update=False, parents=True
+    )
+    assert (
+        loader.load_env(search_path=search_path, environ={}, update=False, parents=True)
+        == expected
+    )
+    assert loader.file_cache_info().currsize == 0
+
+
+def test_discovery_cached(tree):
+    options = {
+        "search_path": str(tree / "a" / "b" / "c"),
+        "parents": True,
+        "update": False,
+    }
+    loader.load_env(environ={}, **options)
+    loader.load_env(environ={}, **options)
+    info = discovery.discovery_cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def test_discovery_notices_new_and_removed_files(tree):
+    options = {
+        "search_path": str(tree / "a" / "b" / "c"),
+        "parents": True,
+        "update": False,
+    }
+    assert loader.load_env(environ={}, **options)["DJANGO_DEBUG"] == "true"
+    (tree / "a" / "b" / ".env").write_text("DJANGO_DEBUG=nearer\n")
+    assert loader.load_env(environ={}, **options)["DJANGO_DEBUG"] == "nearer"
+    (tree / "a" / "b" / ".env").unlink()
+    assert loader.load_env(environ={}, **options)["DJANGO_DEBUG"] == "true"
+
+
+def test_parsed_content_shared(tree):
+    for _ in range(3):
+        env = Env(environ={}, search_path=str(tree), update=False)
+        assert env.bool("DEBUG") is True
+    info = loader.file_cache_info()
+    assert info.misses == 1 and info.hits == 2
+
+
+def test_changed_file_is_reparsed(tree):
+    env_file = tree / ".env"
+    assert Env(environ={}, search_path=str(tree), update=False).bool("DEBUG") is True
+    stat = env_file.stat()
+    env_file.write_text("DJANGO_DEBUG=false\n")
+    # restoring the mtime doesn't hide the change
+    os.utime(env_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert Env(environ={}, search_path=str(tree), update=False).bool("DEBUG") is False
+    assert loader.file_cache_info().misses == 2
+
+
+def test_export_applied_each_time(tree):
+    loader.load_env(search_path=str(tree), environ={}, update=False)
+    assert os.environ.pop("EXPORTED_VAR") == "1"
+    loader.load_env(search_path=str(tree), environ={}, update=False)
+    assert os.environ.pop("EXPORTED_VAR") == "1"
+
+
+def test_encrypted_file_not_cached(tree, monkeypatch):
+    env_crypto = pytest.importorskip("envex.env_crypto")
+    monkeypatch.setattr(env_crypto, "ITERATIONS", 1000)
+    from io import BytesIO
+
+    encrypted = env_crypto.encrypt_data(BytesIO(b"DJANGO_SECRET_KEY=abc\n"), "pw")
+    (tree / "a" / ".env.enc").write_bytes(encrypted.getvalue())
+    options = {"search_path": str(tree / "a"), "decrypt": True, "password": "pw"}
+    for _ in range(2):
+        env = loader.load_env(environ={}, update=False, **options)
+        assert env["DJANGO_SECRET_KEY"] == "abc"
+    assert str(tree / "a" / ".env.enc") not in loader._parsed
+
+
+@pytest.fixture
+def encrypted(tree, monkeypatch):
+    """
+    root/a/.env.enc encrypted with password "pw", counting decryptions
+    """
+    env_crypto = pytest.importorskip("envex.env_crypto")
+    monkeypatch.setattr(env_crypto, "ITERATIONS", 1000)
+    calls = []
+    decrypt_data = env_crypto.decrypt_data
+
+    def counted(stream, password):
+        calls.append(password)
+        return decrypt_data(stream, password)
+
+    monkeypatch.setattr(env_crypto, "decrypt_data", counted)
+
+    def write(content: bytes):
+        from io import BytesIO
+
+        data = env_crypto.encrypt_data(BytesIO(content), "pw").getvalue()
+        (tree / "a" / ".env.enc").write_bytes(data)
+
+    write(b"DJANGO_SECRET_KEY=abc\n")
+    return write, calls
+
+
+def _load_encrypted(tree, password="pw", **kwargs):
+    options = {"search_path": str(tree / "a"), "decrypt": True, "password": password}
+    return loader.load_env(environ={}, update=False, **options, **kwargs)
+
+
+def test_decrypt_cache_in_memory(tree, encrypted):
+    _, calls = encrypted
+    for _ in range(3):
+        assert _load_encrypted(tree, decrypt_cache=True)["DJANGO_SECRET_KEY"] == "abc"
+    assert len(calls) == 1
+    assert loader.decrypt_cache_info() == loader.DecryptCacheInfo(2, 1, 1)
+
+
+def test_decrypt_cache_invalidated_by_change(tree, encrypted):
+    write, calls = encrypted
+    assert _load_encrypted(tree, decrypt_cache=True)["DJANGO_SECRET_KEY"] == "abc"
+    write(b"DJANGO_SECRET_KEY=xyz\n")
+    assert _load_encrypted(tree, decrypt_cache=True)["DJANGO_SECRET_KEY"] == "xyz"
+    assert len(calls) == 2
+
+
+def test_decrypt_cache_keyed_by_password(tree, encrypted):
+    _, calls = encrypted
+    _load_encrypted(tree, decrypt_cache=True)
+    # a wrong password is not served the cached content, and is not cached
+    for _ in range(2):
+        env = _load_encrypted(tree, password="wrong", decrypt_cache=True)
+        assert "DJANGO_SECRET_KEY" not in env
+    assert calls[:2] == ["pw", "wrong"]
+
+
+def test_decrypt_cache_file(tree, encrypted, tmp_path):
+    write, calls = encrypted
+    cache_dir = tmp_path / "shm" / "{uid}"
+    assert _load_encrypted(tree, decrypt_cache=cache_dir)["DJANGO_SECRET_KEY"] == "abc"
+    (cache_file,) = list(tmp_path.glob("shm/*/*.env"))
+    assert cache_file.stat().st_mode & 0o777 == 0o600
+    assert cache_file.parent.stat().st_mode & 0o777 == 0o700
+    assert b"abc" not in cache_file.read_bytes()
+
+    # another process has an empty memory cache, but reads the file
+    loader.clear_decrypt_cache()
+    assert _load_encrypted(tree, decrypt_cache=cache_dir)["DJANGO_SECRET_KEY"] == "abc"
+    assert len(calls) == 1
+
+    # the file is not used with another password
+    loader.clear_decrypt_cache()
+    env = _load_encrypted(tree, password="wrong", decrypt_cache=cache_dir)
+    assert "DJANGO_SECRET_KEY" not in env
+    assert len(calls) == 2
+
+    # changed content replaces the file
+    write(b"DJANGO_SECRET_KEY=xyz\n")
+    assert _load_encrypted(tree, decrypt_cache=cache_dir)["DJANGO_SECRET_KEY"] == "xyz"
+    assert len(calls) == 3
+    (replaced,) = list(tmp_path.glob("shm/*/*.env"))
+    assert replaced != cache_file
+
+
+def test_env_decrypt_cache(tree, encrypted):
+    _, calls = encrypted
+    for _ in range(2):
+        env = Env(
+            readenv=True,
+            search_path=str(tree / "a"),
+            password="pw",
+            decrypt_cache=True,
+            environ={},
+            update=False,
+        )
+        assert env("SECRET_KEY") == "abc"
+    assert len(calls) == 1
+
+
+def test_discovery_faster_when_cached(tree):
+    deep = tree.joinpath(*"defghijklmnop")
+    deep.mkdir(parents=True)
+    paths = discovery.search_paths(str(deep))
+    start = time.perf_counter()
+    for _ in range(50):
+        discovery.find_env_files(".env", paths, True, True)
+    uncached = time.perf_counter() - start
+    discovery.discover(".env", paths, True, True)
+    start = time.perf_counter()
+    for _ in range(50):
+        discovery.discover(".env", paths, True, True)
+    assert time.perf_counter() - start < uncached
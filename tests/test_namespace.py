@@ -0,0 +1,102 @@
+import pytest
+
+from django_settings_env import Env
+from django_settings_env.namespace import KeyIndex, Namespace
+from django_settings_env.preload import clear_frozen_envs
+from django_settings_env.snapshot import SnapshotSecrets
+
+
+def make_env(**environ):
+    return Env(environ=environ, readenv=False)
+
+
+def test_key_index_range():
+    index = KeyIndex(["B", "A_2", "A_1", "AB", "A", "A_1", "\U0010ffffX", 3])
+    assert index.range("A_") == ["A_1", "A_2"]
+    assert index.range("A") == ["A", "AB", "A_1", "A_2"]
+    assert index.range("C") == []
+    assert index.range("\U0010ffff") == ["\U0010ffffX"]
+    assert len(index.range("")) == len(index) == 6
+    index.add("A_0")
+    index.add("A_0")
+    index.discard("A_2")
+    index.discard("missing")
+    assert index.range("A_") == ["A_0", "A_1"]
+    assert "A_0" in index and "A_2" not in index
+
+
+def test_namespace():
+    env = make_env(
+        DJANGO_CACHE_TIMEOUT="300",
+        DJANGO_CACHE_KEY_PREFIX="app",
+        DJANGO_CACHEX="other",
+        DJANGO_DEBUG="true",
+    )
+    cache = env.namespace("DJANGO_CACHE_")
+    assert isinstance(cache, Namespace)
+    assert dict(cache) == {"KEY_PREFIX": "app", "TIMEOUT": "300"}
+    assert cache["TIMEOUT"] == "300"
+    assert "TIMEOUT" in cache and "DEBUG" not in cache
+    assert len(cache) == 2
+    assert dict(cache.namespace("KEY_")) == {"PREFIX": "app"}
+    with pytest.raises(KeyError):
+        cache["MISSING"]
+
+
+def test_namespace_is_live():
+    env = make_env(FEATURE_A="1")
+    features = env.namespace("FEATURE_")
+    env.set("FEATURE_B", "0")
+    assert list(features) == ["A", "B"]
+    env.unset("FEATURE_A", prefix="")
+    assert list(features) == ["B"]
+    env.env["FEATURE_C"] = "1"  # modified directly, not through the env
+    env.clear_caches()
+    assert list(features) == ["B", "C"]
+
+
+def test_namespace_includes_vault_secrets():
+    env = make_env(FEATURE_A="1")
+    features = env.namespace("FEATURE_")
+    assert list(features) == ["A"]
+    # secrets read later are indexed when next used
+    env.secret_manager = SnapshotSecrets({"FEATURE_V": "vault"})
+    assert dict(features) == {"A": "1", "V": "vault"}
+
+
+def test_index_maintained_incrementally():
+    env = make_env(FEATURE_A="1")
+    index = env._key_index()
+    env.set("FEATURE_B", "1")
+    env.unset("FEATURE_A", prefix="")
+    assert env._key_index() is index
+    assert index.range("FEATURE_") == ["FEATURE_B"]
+
+
+def test_namespace_after_reload(tmp_path):
+    (tmp_path / ".env").write_text("FEATURE_A=1\n")
+    env = Env(
+        environ={},
+        search_path=str(tmp_path),
+        update=False,
+        watch={"polling": True, "interval": 60},
+    )
+    env.watcher.close(timeout=0)
+    features = env.namespace("FEATURE_")
+    assert list(features) == ["A"]
+    (tmp_path / ".env").write_text("FEATURE_B=1\n")
+    env.reload()
+    assert list(features) == ["B"]
+
+
+def test_frozen_namespace(tmp_path):
+    (tmp_path / ".env").write_text("FEATURE_A=1\n")
+    env = Env(environ={}, search_path=str(tmp_path), update=False)
+    env.secret_manager = SnapshotSecrets({"FEATURE_V": "vault"})
+    try:
+        env.freeze(gc_freeze=False)
+        index = env._index
+        assert dict(env.namespace("FEATURE_")) == {"A": "1", "V": "vault"}
+        assert env._index is index
+    finally:
+        clear_frozen_envs()
@@ -0,0 +1,99 @@
+import os
+import stat
+import time
+
+import pytest
+
+from django_settings_env import secrets_cache
+from django_settings_env.secrets_cache import CachedSecrets, SecretsCache
+
+pytest.importorskip("Crypto")
+
+SECRETS = {"SECRET_KEY": "secret", "DATABASE_PASSWORD": "password"}
+IDENTITY = SecretsCache.identity({"url": "https://vault:8200", "base_path": "app"}, [""])
+
+
+def make_cache(tmp_path, token="token", identity=IDENTITY, ttl=60):
+    return SecretsCache(tmp_path / "vault.cache", token, identity, ttl=ttl)
+
+
+def test_round_trip(tmp_path):
+    make_cache(tmp_path).save(SECRETS)
+    values, age = make_cache(tmp_path).load()
+    assert values == SECRETS
+    assert 0 <= age < 5
+    assert make_cache(tmp_path).fresh(age)
+
+
+def test_file_is_encrypted_and_private(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.save(SECRETS)
+    data = cache.path.read_bytes()
+    assert data.startswith(secrets_cache.MAGIC_BYTES)
+    assert b"password" not in data
+    assert stat.S_IMODE(os.stat(cache.path).st_mode) == 0o600
+
+
+def test_other_token_or_vault_ignored(tmp_path):
+    make_cache(tmp_path).save(SECRETS)
+    assert make_cache(tmp_path, token="rotated").load() is None
+    other = SecretsCache.identity(
+        {"url": "https://vault:8200", "base_path": "app"}, ["db"]
+    )
+    assert make_cache(tmp_path, identity=other).load() is None
+
+
+def test_tampered_or_other_version_ignored(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path)
+    cache.save(SECRETS)
+    data = bytearray(cache.path.read_bytes())
+    data[-1] ^= 1
+    cache.path.write_bytes(bytes(data))
+    assert cache.load() is None
+    cache.save(SECRETS)
+    monkeypatch.setattr(secrets_cache, "CACHE_VERSION", secrets_cache.CACHE_VERSION + 1)
+    assert cache.load() is None
+
+
+def test_expiry(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, ttl=10)
+    cache.save(SECRETS)
+    now = time.time()
+    monkeypatch.setattr(secrets_cache.time, "time", lambda: now + 11)
+    # expired secrets are still returned, for use when vault is unavailable
+    values, age = cache.load()
+    assert values == SECRETS
+    assert not cache.fresh(age)
+
+
+def test_missing_or_unwritable(tmp_path):
+    assert make_cache(tmp_path).load() is None
+    (tmp_path / "file").write_text("")
+    SecretsCache(tmp_path / "file" / "vault.cache", "token", IDENTITY).save(SECRETS)
+
+
+def test_path_uid(tmp_path):
+    cache = SecretsCache(str(tmp_path / "vault-{uid}.cache"), "token", IDENTITY)
+    assert cache.path.name == f"vault-{os.getuid()}.cache"
+
+
+def test_lock(tmp_path):
+    cache = make_cache(tmp_path)
+    with cache.lock(1):
+        start = time.perf_counter()
+        # flock locks are per open file, so a second open waits for the timeout
+        with cache.lock(0.2):
+            assert time.perf_counter() - start >= 0.2
+
+
+def test_cached_secrets():
+    class Manager:
+        base_path = "secret/data/app"
+
+    cached = CachedSecrets(Manager(), dict(SECRETS))
+    assert cached.get_secret("SECRET_KEY") == "secret"
+    assert cached.get_secret("MISSING", "default") == "default"
+    with pytest.raises(KeyError):
+        cached.get_secret("MISSING", error=True)
+    assert sorted(cached.list_secrets()) == sorted(SECRETS)
+    assert cached.base_path == "secret/data/app"
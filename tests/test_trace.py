@@ -0,0 +1,115 @@
+import json
+from io import BytesIO
+
+import pytest
+from envex import env_crypto
+
+import django_settings_env
+from django_settings_env import Env, apps, loader, trace
+from django_settings_env.env_django import DjangoEnv
+from django_settings_env.snapshot import SnapshotSecrets
+
+
+@pytest.fixture(autouse=True)
+def traces(monkeypatch):
+    monkeypatch.delenv(trace.TRACE_VAR, raising=False)
+    monkeypatch.setattr(trace, "_traces", [])
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / ".env").write_text(
+        "DJANGO_DEBUG=true\nDATABASE_URL=sqlite:///db.sqlite3\n"
+    )
+    return tmp_path
+
+
+def traced_env(project, **kwargs):
+    return Env(
+        environ={"HOME_VAR": "home"},
+        search_path=str(project),
+        update=False,
+        trace=True,
+        **kwargs,
+    )
+
+
+def test_trace_disabled_by_default(project):
+    env = Env(environ={}, search_path=str(project), update=False)
+    assert type(env) is DjangoEnv
+    assert not hasattr(env, "trace")
+    assert trace.traces() == []
+
+
+def test_trace_sources(project):
+    env = traced_env(project)
+    assert isinstance(env, DjangoEnv)
+    env.bool("DEBUG")
+    env.get("HOME_VAR")
+    env.get("MISSING", "fallback")
+    env.secret_manager = SnapshotSecrets({"DJANGO_TOKEN": "secret"})
+    env.get("TOKEN")
+
+    values = env.trace.as_dict()["values"]
+    assert values["DJANGO_DEBUG"]["source"] == "file"
+    assert values["DJANGO_DEBUG"]["prefixed"] is True
+    assert values["DJANGO_DEBUG"]["path"] == (project / ".env").as_posix()
+    assert values["HOME_VAR"] == {
+        "var": "HOME_VAR",
+        "prefixed": False,
+        "source": "os env",
+        "count": 1,
+        "seconds": values["HOME_VAR"]["seconds"],
+    }
+    assert values["DJANGO_MISSING"]["source"] == "default"
+    assert values["DJANGO_TOKEN"]["source"] == "vault"
+
+
+def test_trace_phases(project):
+    env = traced_env(project)
+    env.database_url()
+    data = env.trace.as_dict()
+    phases = {entry["phase"] for entry in data["phases"]}
+    assert {"init", "discovery", "read_env", "load", "url parse", "plugin"} <= phases
+    discovery = next(p for p in data["phases"] if p["phase"] == "discovery")
+    assert discovery["files"] == [(project / ".env").as_posix()]
+    assert set(data["totals"]) >= phases - {"plugin import"}
+    # the .env loader is only wrapped while reading
+    assert not hasattr(loader.load_file, "__traced__")
+
+
+def test_trace_encrypted_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(env_crypto, "ITERATIONS", 1000)
+    encrypted = env_crypto.encrypt_data(BytesIO(b"DJANGO_SECRET_KEY=abc\n"), "pw")
+    (tmp_path / ".env.enc").write_bytes(encrypted.getvalue())
+    env = traced_env(tmp_path, decrypt=True, password="pw")
+    assert env.get("SECRET_KEY") == "abc"
+    assert env.trace.values["DJANGO_SECRET_KEY"]["source"] == "encrypted file"
+    assert "decrypt and load" in env.trace.totals()
+
+
+def test_trace_enabled_by_environment(project, tmp_path, monkeypatch):
+    output = tmp_path / "trace.json"
+    monkeypatch.setenv(trace.TRACE_VAR, str(output))
+    env = Env(environ={}, search_path=str(project), update=False)
+    env.get("DEBUG")
+    assert Env(environ={}, readenv=False, trace=False).__class__ is DjangoEnv
+
+    trace.dump_traces()
+    data = json.loads(output.read_text())
+    assert len(data["traces"]) == 1
+    assert data["traces"][0]["values"]["DJANGO_DEBUG"]["source"] == "file"
+
+
+def test_app_ready_dumps_traces(project, tmp_path, monkeypatch):
+    from django.conf import LazySettings
+
+    output = tmp_path / "trace.json"
+    settings = LazySettings()
+    settings.configure(SETTINGS_ENV_TRACE_FILE=str(output))
+    monkeypatch.setattr(apps, "settings", settings)
+    traced_env(project).get("DEBUG")
+
+    apps.DjangoSettingsEnvConfig("django_settings_env", django_settings_env).ready()
+
+    assert json.loads(output.read_text())["traces"][0]["prefix"] == "DJANGO_"